@@ -0,0 +1,103 @@
+"""
+Latency of the task list endpoints before and after archiving old completed
+tasks, on one seeded database (archiving changes it: use a copy).
+
+    python -m benchmarks.seed --scale 10m --database-url sqlite:///bench10m.db
+    cp bench10m.db archive10m.db
+    python -m benchmarks.archive --database-url sqlite:///archive10m.db --days 90
+
+Runs the hot-table scenarios (and their include_archived variants) with the
+benchmarks.run load generator, archives everything completed more than
+--days ago, runs them again and prints both side by side. Results are
+written as JSON like benchmarks.run (default: benchmarks/results/).
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.run import RESULTS_DIR, SCENARIOS, _git_rev, load_context, run_all
+
+SCENARIO_NAMES = (
+    "tasks_by_user", "tasks_by_project", "admin_tasks", "admin_tasks_full", "member_tasks",
+    "tasks_by_user_all", "admin_tasks_all", "member_tasks_all",
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True, help="a copy of a database seeded by benchmarks.seed")
+    parser.add_argument("--days", type=float, default=90, help="archive tasks completed more than this many days ago")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per scenario and phase")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    # the app reads its configuration at import time
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["ADMISSION_CONTROL"] = "off"
+    from core import archive
+    from core.database import DB_MODE, engine
+    from core.migrations import migrate
+    from core.passwords import password_hasher
+
+    migrate(engine)
+    scenarios = [s for s in SCENARIOS if s.name in SCENARIO_NAMES]
+    before_counts = archive.status(engine, args.days)
+    if not before_counts["due"]:
+        raise SystemExit(f"no task completed more than {args.days:g} days ago: nothing to compare")
+
+    async def phases():
+        print(f"before: {before_counts}")
+        before = await run_all(scenarios, load_context(engine), args)
+        start = time.perf_counter()
+        moved = await asyncio.to_thread(archive.archive_completed, engine, args.days)
+        took = time.perf_counter() - start
+        print(f"\narchived {moved} task(s) in {took:.1f}s: {archive.status(engine, args.days)}\n")
+        after = await run_all(scenarios, load_context(engine), args)
+        return before, after, moved, took
+
+    try:
+        before, after, moved, took = asyncio.run(phases())
+    finally:
+        password_hasher.shutdown()
+
+    print(f"\n{'scenario':<18} {'p50 ms':>19} {'p95 ms':>19} {'req/s':>19}")
+    for name, b in before.items():
+        a = after[name]
+        print(f"{name:<18} {b['p50_ms']:>8.2f} -> {a['p50_ms']:<8.2f} {b['p95_ms']:>8.2f} -> {a['p95_ms']:<8.2f} "
+              f"{b['throughput_rps']:>8.1f} -> {a['throughput_rps']:<8.1f}")
+
+    report = {
+        "meta": {
+            "git_rev": _git_rev(),
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "dialect": engine.dialect.name,
+            "db_mode": DB_MODE,
+            "dataset": before_counts,
+            "archive_days": args.days,
+            "archived": moved,
+            "archive_seconds": round(took, 1),
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+        },
+        "before": before,
+        "after": after,
+    }
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{report['meta']['git_rev']}-archive.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nresults written to {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
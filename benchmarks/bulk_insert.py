@@ -0,0 +1,99 @@
+"""
+Compare the bulk write layer against the per-row ORM path it replaced.
+
+    python -m benchmarks.bulk_insert --members 10000
+
+Runs against a throw-away SQLite file unless --database-url is given.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import event
+from sqlmodel import Session, create_engine
+
+from core import bulk
+from core.migrations import migrate
+from models.models import Project, Task, Team, TeamMemberLink, User
+
+
+def _seed_users(engine, n: int) -> list:
+    with Session(engine) as session:
+        session.add_all(User(name=f"user{i}", email=f"user{i}@bench.local", password="x") for i in range(n))
+        session.commit()
+        return [u.id for u in session.exec(User.__table__.select()).all()]
+
+
+def legacy_path(engine, user_ids: list) -> None:
+    """What create_team + create_project_with_tasks did before: row-by-row adds, refresh per row."""
+    with Session(engine) as session:
+        team = Team(name="legacy", created_by=user_ids[0])
+        session.add(team)
+        session.commit()
+        session.refresh(team)
+        for uid in user_ids:
+            session.add(TeamMemberLink(team_id=team.id, user_id=uid))
+        session.commit()
+
+        proj = Project(name="legacy", team_id=team.id, created_by=user_ids[0])
+        session.add(proj)
+        session.commit()
+        session.refresh(proj)
+        tasks = []
+        for uid in user_ids:
+            t = Task(title="task", description="", project_id=proj.id, assigned_to=uid)
+            session.add(t)
+            tasks.append(t)
+        session.commit()
+        for t in tasks:
+            session.refresh(t)
+
+
+def bulk_path(engine, user_ids: list) -> None:
+    with Session(engine) as session:
+        team_id = bulk.insert_team(session, name="bulk", description=None, created_by=user_ids[0])
+        bulk.insert_team_members(session, team_id, user_ids)
+        proj = bulk.insert_project(session, name="bulk", description=None, team_id=team_id, created_by=user_ids[0])
+        bulk.insert_tasks(session, (
+            {"title": "task", "description": "", "project_id": proj.id, "assigned_to": uid}
+            for uid in user_ids
+        ), team_id=team_id)
+        session.commit()
+
+
+def _measure(engine, fn, user_ids: list) -> dict:
+    statements = {"n": 0}
+
+    def count(*args):
+        statements["n"] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    start = time.perf_counter()
+    fn(engine, user_ids)
+    elapsed = time.perf_counter() - start
+    event.remove(engine, "before_cursor_execute", count)
+    return {"seconds": round(elapsed, 4), "statements": statements["n"]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=10000)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(url)
+    migrate(engine)
+    user_ids = _seed_users(engine, args.members)
+
+    legacy = _measure(engine, legacy_path, user_ids)
+    fast = _measure(engine, bulk_path, user_ids)
+    print(f"members={args.members}")
+    print(f"legacy: {legacy['seconds']:.3f}s  {legacy['statements']} statements")
+    print(f"bulk:   {fast['seconds']:.3f}s  {fast['statements']} statements")
+    print(f"speedup: {legacy['seconds'] / fast['seconds']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Drive the API in-process (ASGI, no network) with concurrent clients and report
+throughput and p50/p95/p99 latency per endpoint.
+
+    python -m benchmarks.seed --scale 100k --database-url sqlite:///bench.db
+    python -m benchmarks.run --database-url sqlite:///bench.db --concurrency 16 --duration 10
+    python -m benchmarks.run --database-url sqlite:///bench.db --baseline benchmarks/results/before.json
+
+Results are written as JSON (default: benchmarks/results/<time>-<git rev>.json).
+With --baseline every scenario is compared against the earlier run, and the
+exit code is 1 when p95 latency or throughput regressed by more than
+--max-regression (default 20%). Scenarios that write (create_task,
+update_status, login) change the data set: reseed before comparing runs, or
+pass --read-only.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+# frequent words, prefixes and two-word queries
+SEARCH_WORDS = ("design", "review", "deploy", "invoice", "dash", "mig", "release hot", "audit export")
+
+
+class Request(NamedTuple):
+    method: str
+    url: str
+    json: Optional[dict] = None
+    headers: Optional[dict] = None
+
+
+class Scenario(NamedTuple):
+    name: str
+    writes: bool
+    build: Callable[[random.Random, dict], Request]
+
+
+# -------------------------------
+# Scenarios (one per endpoint / access pattern)
+# -------------------------------
+SCENARIOS: List[Scenario] = [
+    Scenario("health", False, lambda r, c: Request("GET", "/health")),
+    Scenario("users_list", False, lambda r, c: Request("GET", "/users_list?limit=100")),
+    Scenario("teams_list", False, lambda r, c: Request("GET", "/teams_list?limit=100")),
+    Scenario("projects", False, lambda r, c: Request("GET", f"/projects?team_id={r.choice(c['teams'])}")),
+    Scenario("tasks_by_user", False, lambda r, c: Request("GET", f"/tasks?user_id={r.choice(c['users'])}&limit=100")),
+    Scenario("tasks_by_project", False, lambda r, c: Request("GET", f"/tasks?project_id={r.choice(c['projects'])}&limit=100")),
+    Scenario("admin_tasks", False, lambda r, c: Request("GET", "/admin/tasks?limit=100")),
+    Scenario("admin_tasks_full", False, lambda r, c: Request("GET", "/admin/tasks?limit=1000")),
+    Scenario("member_tasks", False, lambda r, c: Request("GET", f"/member/tasks?user_id={r.choice(c['users'])}&limit=100")),
+    Scenario("member_tasks_304", False, lambda r, c: Request(
+        "GET", f"/member/tasks?user_id={c['etag_user']}&limit=100", headers={"If-None-Match": c["etag"]}
+    )),
+    # hot + archived tasks (the same as the above until core.archive has run)
+    Scenario("tasks_by_user_all", False, lambda r, c: Request(
+        "GET", f"/tasks?user_id={r.choice(c['users'])}&limit=100&include_archived=true"
+    )),
+    Scenario("admin_tasks_all", False, lambda r, c: Request("GET", "/admin/tasks?limit=100&include_archived=true")),
+    Scenario("member_tasks_all", False, lambda r, c: Request(
+        "GET", f"/member/tasks?user_id={r.choice(c['users'])}&limit=100&include_archived=true"
+    )),
+    Scenario("tasks_summary", False, lambda r, c: Request("GET", f"/tasks/summary?team_id={r.choice(c['teams'])}")),
+    Scenario("search", False, lambda r, c: Request("GET", f"/search?q={r.choice(SEARCH_WORDS)}&limit=20")),
+    Scenario("workspace", False, lambda r, c: Request("GET", f"/users/{r.choice(c['users'])}/workspace")),
+    # a client catching up on the last few hundred changes
+    Scenario("sync", False, lambda r, c: Request(
+        "GET", f"/sync?since={max(1, c['sync_head'] - r.randrange(1, 1000))}&limit=500"
+    )),
+    Scenario("export_project", False, lambda r, c: Request(
+        "GET", f"/export/tasks?project_id={r.choice(c['projects'])}&format=ndjson"
+    )),
+    Scenario("batch", False, lambda r, c: _batch(r, c)),
+    Scenario("create_task", True, lambda r, c: _create_task(r, c)),
+    Scenario("update_status", True, lambda r, c: _update_status(r, c)),
+    Scenario("login", True, lambda r, c: Request(
+        "POST", "/login", json={"email": f"user{r.randrange(c['user_count'])}@{c['email_domain']}", "password": c["password"]}
+    )),
+]
+
+
+def _batch(rnd: random.Random, ctx: dict) -> Request:
+    # what a dashboard loads on open, in one round trip
+    user_id, team_id = rnd.choice(ctx["users"]), rnd.choice(ctx["teams"])
+    return Request("POST", "/batch", json={"requests": [
+        {"path": f"/member/tasks?user_id={user_id}&limit=100"},
+        {"path": f"/projects?team_id={team_id}"},
+        {"path": f"/tasks/summary?team_id={team_id}"},
+        {"path": "/teams_list?limit=100"},
+    ]})
+
+
+def _create_task(rnd: random.Random, ctx: dict) -> Request:
+    project_id, member = rnd.choice(ctx["assignable"])
+    return Request("POST", f"/create_task?project_id={project_id}", json={"title": "bench task", "assigned_to": member})
+
+
+def _update_status(rnd: random.Random, ctx: dict) -> Request:
+    task_id, assignee = rnd.choice(ctx["tasks"])
+    status = rnd.choice(("To-Do", "In Progress", "Completed"))
+    return Request("PATCH", f"/tasks/{task_id}/status?user_id={assignee}", json={"status": status})
+
+
+def load_context(engine) -> dict:
+    """Ids the scenarios pick from, sampled from the seeded data."""
+    from sqlmodel import Session, func, select
+
+    from benchmarks.seed import BENCH_EMAIL_DOMAIN, BENCH_PASSWORD
+    from models.models import ChangeLog, Project, Task, Team, TeamMemberLink, User
+
+    with Session(engine) as session:
+        counts = {
+            "users": session.exec(select(func.count()).select_from(User)).one(),
+            "teams": session.exec(select(func.count()).select_from(Team)).one(),
+            "projects": session.exec(select(func.count()).select_from(Project)).one(),
+            "tasks": session.exec(select(func.count()).select_from(Task)).one(),
+        }
+        if not counts["tasks"]:
+            raise SystemExit("database has no tasks; run `python -m benchmarks.seed` first")
+        sample = lambda query: session.exec(query.order_by(func.random()).limit(2000)).all()
+        return {
+            "counts": counts,
+            "user_count": counts["users"],
+            "password": BENCH_PASSWORD,
+            "email_domain": BENCH_EMAIL_DOMAIN,
+            "users": sample(select(User.id)),
+            "teams": sample(select(Team.id)),
+            "projects": sample(select(Project.id)),
+            "tasks": [tuple(r) for r in sample(select(Task.id, Task.assigned_to))],
+            "sync_head": session.exec(select(func.max(ChangeLog.seq))).one() or 0,
+            "assignable": [tuple(r) for r in sample(
+                select(Project.id, TeamMemberLink.user_id)
+                .join(TeamMemberLink, TeamMemberLink.team_id == Project.team_id)
+            )],
+        }
+
+
+# -------------------------------
+# Load generation
+# -------------------------------
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(client, scenario: Scenario, ctx: dict, concurrency: int,
+                       duration: float, warmup: int, seed: int) -> Dict[str, Any]:
+    async def send(rnd: random.Random):
+        req = scenario.build(rnd, ctx)
+        return await client.request(req.method, req.url, json=req.json, headers=req.headers)
+
+    rnd = random.Random(seed)
+    for _ in range(warmup):
+        await send(rnd)
+
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    deadline = time.perf_counter() + duration
+
+    async def worker(n: int) -> None:
+        worker_rnd = random.Random(seed * 1000 + n)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await send(worker_rnd)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = lambda s: round(s * 1000, 3)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else 0.0,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1]) if latencies else 0.0,
+    }
+
+
+async def run_all(scenarios: List[Scenario], ctx: dict, args) -> Dict[str, Any]:
+    import httpx
+
+    from main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        first = await client.get(f"/member/tasks?user_id={ctx['users'][0]}&limit=100")
+        ctx["etag_user"], ctx["etag"] = ctx["users"][0], first.headers.get("etag", "")
+
+        results: Dict[str, Any] = {}
+        for n, scenario in enumerate(scenarios):
+            results[scenario.name] = await run_scenario(
+                client, scenario, ctx, args.concurrency, args.duration, args.warmup, args.seed + n
+            )
+            r = results[scenario.name]
+            print(f"{scenario.name:<18} {r['throughput_rps']:>9.1f} req/s  p50 {r['p50_ms']:>8.2f}  "
+                  f"p95 {r['p95_ms']:>8.2f}  p99 {r['p99_ms']:>8.2f} ms"
+                  + (f"  errors {r['errors']}" if r["errors"] else ""))
+        return results
+
+
+# -------------------------------
+# Baseline comparison
+# -------------------------------
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Print a delta table; return the scenarios that regressed beyond `max_regression`."""
+    regressed = []
+    print(f"\n{'scenario':<18} {'req/s':>16} {'p95 ms':>16}")
+    for name, now in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            print(f"{name:<18} {'(new)':>16}")
+            continue
+        rps = now["throughput_rps"] / before["throughput_rps"] - 1 if before["throughput_rps"] else 0.0
+        p95 = now["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        flag = rps < -max_regression or p95 > max_regression
+        if flag:
+            regressed.append(name)
+        print(f"{name:<18} {rps:>+15.1%} {p95:>+15.1%}" + ("  REGRESSION" if flag else ""))
+    return regressed
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True, help="a database seeded by benchmarks.seed")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="requests per scenario before measuring")
+    parser.add_argument("--only", default="", help="comma separated scenario names")
+    parser.add_argument("--read-only", action="store_true", help="skip scenarios that write")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default=None)
+    parser.add_argument("--baseline", default=None, help="earlier result JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    parser.add_argument("--admission-control", action="store_true",
+                        help="keep admission control and rate limits on (all clients share one address)")
+    args = parser.parse_args()
+
+    # the app reads its configuration at import time
+    os.environ["DATABASE_URL"] = args.database_url
+    if not args.admission_control:
+        os.environ["ADMISSION_CONTROL"] = "off"
+    from core.database import DB_MODE, engine
+    from core.migrations import migrate
+    from core.passwords import password_hasher
+
+    only = {name for name in args.only.split(",") if name}
+    scenarios = [
+        s for s in SCENARIOS
+        if (not only or s.name in only) and not (args.read_only and s.writes)
+    ]
+    migrate(engine)
+    ctx = load_context(engine)
+    try:
+        results = asyncio.run(run_all(scenarios, ctx, args))
+    finally:
+        password_hasher.shutdown()
+
+    report = {
+        "meta": {
+            "git_rev": _git_rev(),
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "dialect": engine.dialect.name,
+            "db_mode": DB_MODE,
+            "dataset": ctx["counts"],
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+        },
+        "results": results,
+    }
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{report['meta']['git_rev']}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nresults written to {out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("dataset") != report["meta"]["dataset"]:
+            print("warning: baseline was taken on a different data set")
+        regressed = compare(report, baseline, args.max_regression)
+        if regressed:
+            print(f"regressed: {', '.join(regressed)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
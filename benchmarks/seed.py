@@ -0,0 +1,153 @@
+"""
+Seed a database with synthetic users, teams, projects and tasks.
+
+    python -m benchmarks.seed --scale 100k --database-url sqlite:///bench.db
+    python -m benchmarks.seed --tasks 250000 --seed 7
+
+Scales: 10k / 100k / 1m / 10m tasks (about one user per 20 tasks). Team sizes follow
+a Pareto distribution, so a few large teams own most projects and tasks while
+the long tail has two or three members -- the shape that stresses per-team
+queries and counters. The same --seed always produces the same data. Every
+user's password is BENCH_PASSWORD.
+"""
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import time
+from datetime import timedelta
+from typing import Dict, List
+
+from sqlalchemy import insert
+from sqlmodel import Session, create_engine
+
+from core import bulk, versions
+from core.migrations import migrate
+from core.passwords import hash_password
+from models.models import User, utcnow
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+BENCH_PASSWORD = "bench-password"
+STATUSES = ("To-Do", "In Progress", "Completed")
+STATUS_WEIGHTS = (0.5, 0.2, 0.3)
+TASKS_PER_USER = 20
+INSERT_BATCH = 5000
+# task creation times run evenly, in insertion order, over this many past days
+HISTORY_DAYS = 365
+# completed tasks were completed up to this many hours after creation
+COMPLETION_HOURS = 14 * 24
+
+BENCH_EMAIL_DOMAIN = "bench.example.com"
+
+# Common work words first, then a long tail of made-up ones; Zipf weights make
+# word frequencies (and so full-text match counts) look like real text
+COMMON_WORDS = (
+    "design review deploy backend frontend database migration report invoice meeting "
+    "planning release hotfix onboarding search index cache metrics alert budget roadmap "
+    "customer sprint retro audit billing signup login export import dashboard mobile api"
+).split()
+_SYLLABLES = ("ka", "lo", "mi", "ren", "to", "sa", "vi", "dor", "pe", "lun", "ta", "gri", "no", "bex", "ul")
+_vocab_rnd = random.Random(0)
+_WORDS = COMMON_WORDS + sorted({
+    "".join(_vocab_rnd.choices(_SYLLABLES, k=_vocab_rnd.randint(2, 4))) for _ in range(6000)
+})
+_CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(_WORDS))))
+
+
+def _text(rnd: random.Random, n: int) -> str:
+    return " ".join(rnd.choices(_WORDS, cum_weights=_CUM_WEIGHTS, k=n))
+
+
+def team_sizes(rnd: random.Random, users: int) -> List[int]:
+    """Pareto-distributed sizes (2 .. users/4) until ~1.5 memberships per user."""
+    sizes: List[int] = []
+    cap = max(2, users // 4)
+    while sum(sizes) < users * 1.5:
+        sizes.append(min(cap, 1 + int(rnd.paretovariate(1.3) * 2)))
+    return sizes
+
+
+def seed(engine, tasks: int, seed: int = 42) -> Dict[str, int]:
+    rnd = random.Random(seed)
+    n_users = max(10, tasks // TASKS_PER_USER)
+    password = hash_password(BENCH_PASSWORD)  # hashed once, shared by every user
+
+    with Session(engine) as session:
+        user_ids = [
+            r.id for r in session.exec(insert(User).returning(User.id), params=[
+                {"name": f"user{i}", "email": f"user{i}@{BENCH_EMAIL_DOMAIN}", "password": password, "is_admin": i % 50 == 0}
+                for i in range(n_users)
+            ]).all()
+        ]
+        versions.bump(session, ["user"])
+
+        # teams, members, and one project per ~4 members
+        teams = []  # (team_id, member ids, project ids)
+        for n, size in enumerate(team_sizes(rnd, n_users)):
+            members = rnd.sample(user_ids, size)
+            team_id = bulk.insert_team(session, f"team {n} {_text(rnd, 1)}", _text(rnd, 6), created_by=members[0])
+            bulk.insert_team_members(session, team_id, members)
+            projects = [
+                bulk.insert_project(session, f"{_text(rnd, 2)} {p}", _text(rnd, 8), team_id, members[0]).id
+                for p in range(1 + size // 4)
+            ]
+            teams.append((team_id, members, projects))
+        session.commit()
+
+        # tasks land on teams in proportion to their size (big teams get most)
+        weights = [len(members) for _, members, _ in teams]
+        now = utcnow()
+        history_start = now - timedelta(days=HISTORY_DAYS)
+        step = timedelta(days=HISTORY_DAYS) / tasks
+        remaining = tasks
+        while remaining:
+            batch = min(INSERT_BATCH, remaining)
+            by_team: Dict[int, List[dict]] = {}
+            for k, team_index in enumerate(rnd.choices(range(len(teams)), weights, k=batch), tasks - remaining):
+                team_id, members, projects = teams[team_index]
+                row = {
+                    "title": _text(rnd, 4),
+                    "description": _text(rnd, 12) if rnd.random() < 0.7 else None,
+                    "status": rnd.choices(STATUSES, STATUS_WEIGHTS)[0],
+                    "project_id": rnd.choice(projects),
+                    "assigned_to": rnd.choice(members),
+                    "created_at": history_start + step * k,
+                }
+                if row["status"] == "Completed":
+                    # derived from k rather than drawn, so a seed's other values stay as they were
+                    row["completed_at"] = min(now, row["created_at"] + timedelta(hours=k * 7919 % COMPLETION_HOURS))
+                by_team.setdefault(team_index, []).append(row)
+            for team_index, rows in by_team.items():
+                bulk.insert_tasks(session, rows, team_id=teams[team_index][0])
+            session.commit()
+            remaining -= batch
+
+    return {
+        "users": n_users,
+        "teams": len(teams),
+        "projects": sum(len(p) for _, _, p in teams),
+        "tasks": tasks,
+        "largest_team": max(weights),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="10k")
+    parser.add_argument("--tasks", type=int, default=None, help="overrides --scale")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(url)
+    migrate(engine)
+    start = time.perf_counter()
+    counts = seed(engine, args.tasks or SCALES[args.scale], args.seed)
+    print(f"seeded {url} in {time.perf_counter() - start:.1f}s: "
+          + ", ".join(f"{k}={v}" for k, v in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Iterable, Optional, Tuple
+
+from fastapi import HTTPException
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from core.metrics import Counter, Gauge, Histogram
+from core.security import token_verifier
+
+ADMISSION_IN_FLIGHT = Gauge("admission_in_flight", "Requests running per route class", ["route_class"])
+ADMISSION_QUEUE_DEPTH = Gauge("admission_queue_depth", "Requests waiting for a slot per route class", ["route_class"])
+ADMISSION_WAIT = Histogram("admission_queue_wait_seconds", "Time spent waiting for a slot", ["route_class"])
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total", "Requests refused before running, by reason", ["route_class", "reason"]
+)
+
+
+# -------------------------------
+# Per-class concurrency limit with a bounded wait queue
+# -------------------------------
+class RouteClass:
+    """
+    At most `concurrency` requests of the class run at once; up to `queue` more
+    wait (first come, first served) for at most `timeout` seconds. Anything
+    beyond that is answered 503 straight away instead of piling up.
+    """
+
+    def __init__(self, concurrency: int, queue: int = 0, timeout: float = 1.0, rate_limited: bool = True):
+        self.concurrency = concurrency
+        self.queue = queue
+        self.timeout = timeout
+        self.rate_limited = rate_limited
+        self.name = ""
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.timeout))
+
+    def _publish(self) -> None:
+        ADMISSION_IN_FLIGHT.set(self.in_flight, labels=(self.name,))
+        ADMISSION_QUEUE_DEPTH.set(len(self._waiters), labels=(self.name,))
+
+    async def acquire(self) -> Optional[str]:
+        """Take a slot; returns the rejection reason instead when there is none in time."""
+        if self.in_flight < self.concurrency and not self._waiters:
+            self.in_flight += 1
+            self._publish()
+            return None
+        if len(self._waiters) >= self.queue:
+            return "queue_full"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._publish()
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.timeout)
+        except asyncio.TimeoutError:
+            if waiter.done():
+                return None  # handed a slot just as the wait ran out
+            self._waiters.remove(waiter)
+            waiter.cancel()
+            return "timeout"
+        except BaseException:
+            # cancelled while waiting (client gone): pass on a slot handed over meanwhile
+            if waiter.done():
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+                waiter.cancel()
+            raise
+        finally:
+            ADMISSION_WAIT.observe(time.perf_counter() - start, labels=(self.name,))
+            self._publish()
+        return None
+
+    def release(self) -> None:
+        # hand the slot straight to the oldest waiter, so in_flight never dips
+        # below the cap while requests are queued
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._publish()
+                return
+        self.in_flight -= 1
+        self._publish()
+
+
+# -------------------------------
+# Per-client token buckets
+# -------------------------------
+class TokenBuckets:
+    """
+    `rate` requests per second per client, with bursts of up to `burst`.
+    Buckets live in a bounded LRU; a client evicted from it starts full again.
+    """
+
+    def __init__(self, rate: float, burst: float, maxsize: int = 100_000):
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str) -> float:
+        """Spend one token; returns 0, or the seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, stamp = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - stamp) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+def client_key(scope: Scope, proxy_hops: int = 0) -> str:
+    """
+    The user of a valid bearer token, otherwise the client address. Behind
+    `proxy_hops` reverse proxies that address is the X-Forwarded-For entry the
+    outermost of them appended: counted from the right, since everything to
+    its left was sent by the client and can be anything.
+    """
+    forwarded = []
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                try:
+                    return f"user:{token_verifier.verify(token.strip()).user_id}"
+                except HTTPException:
+                    pass
+        elif name == b"x-forwarded-for":
+            forwarded += [hop.strip() for hop in value.decode("latin-1").split(",")]
+    if proxy_hops and len(forwarded) >= proxy_hops:
+        return f"ip:{forwarded[-proxy_hops]}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+# -------------------------------
+# Middleware
+# -------------------------------
+class AdmissionMiddleware:
+    """
+    Sorts each request into a route class by its path template (`routes`
+    maps templates to class names; the rest go to `default`), applies the
+    per-client rate limit, then the class's concurrency limit. Refusals are
+    JSON 429 (rate limit) or 503 (class saturated) with `Retry-After`.
+    Limits are per process: with N uvicorn workers the totals are N times higher.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        classes: Dict[str, RouteClass],
+        routes: Dict[str, str],
+        default: str = "default",
+        rate_limit: Optional[TokenBuckets] = None,
+        exempt: Iterable[str] = (),
+        proxy_hops: int = 0,
+    ):
+        self.app = app
+        self.classes = classes
+        for name, route_class in classes.items():
+            route_class.name = name
+        missing = (set(routes.values()) | {default}) - set(classes)
+        if missing:
+            raise ValueError(f"unknown route classes: {sorted(missing)}")
+        self.routes = routes
+        self.default = default
+        self.rate_limit = rate_limit
+        self.exempt = tuple(exempt)
+        self.proxy_hops = proxy_hops
+
+    def _exempt(self, path: str) -> bool:
+        # whole path segments: "/events" covers "/events/x" but not "/eventsx"
+        return any(path == p or path.startswith(p + "/") for p in self.exempt)
+
+    def _classify(self, scope: Scope) -> RouteClass:
+        for route in scope["app"].routes:
+            match, child_scope = route.matches(scope)
+            if match == Match.FULL:
+                # let the instrumentation label even refused requests by route
+                scope["endpoint"] = child_scope.get("endpoint")
+                return self.classes[self.routes.get(getattr(route, "path_format", ""), self.default)]
+        return self.classes[self.default]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # POST /batch sub-requests run inside the already admitted batch
+        if scope["type"] != "http" or scope.get("batch") or self._exempt(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        route_class = self._classify(scope)
+        if self.rate_limit is not None and route_class.rate_limited:
+            wait = self.rate_limit.take(client_key(scope, self.proxy_hops))
+            if wait:
+                ADMISSION_REJECTED.inc(labels=(route_class.name, "rate_limited"))
+                await _refuse(send, 429, "Too many requests", math.ceil(wait))
+                return
+
+        reason = await route_class.acquire()
+        if reason is not None:
+            ADMISSION_REJECTED.inc(labels=(route_class.name, reason))
+            await _refuse(send, 503, "Server busy, retry later", route_class.retry_after)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route_class.release()
+
+
+async def _refuse(send: Send, status: int, detail: str, retry_after: int) -> None:
+    body = f'{{"detail":"{detail}"}}'.encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,149 @@
+"""
+Move tasks completed more than ARCHIVE_AFTER_DAYS ago from `task` into
+`taskarchive`, in small batches. The worker runs this periodically; by hand:
+
+    python -m core.archive                 # archive everything that is due
+    python -m core.archive --days 30       # another age threshold
+    python -m core.archive status          # hot / archived / due counts
+
+Each batch is its own short transaction (DELETE ... RETURNING into the
+archive), so writers wait at most one batch and an interrupted run simply
+continues with the next call: whatever is still due is still in `task`.
+Archived tasks are read-only; the list endpoints and /search read them with
+`include_archived=true`, exports include them by default, and the dashboard
+counters keep counting them.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import delete, func, insert, select, union_all
+from sqlalchemy.orm import aliased
+from sqlmodel import Session
+
+from core import changes, versions
+from core.metrics import Counter
+from models.models import Project, Task, TaskArchive, utcnow
+
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+# Pause between batches, so waiting writers get the (SQLite) write lock
+ARCHIVE_PAUSE = float(os.getenv("ARCHIVE_PAUSE_SECONDS", "0.05"))
+
+TASKS_ARCHIVED = Counter("tasks_archived_total", "Tasks moved to the archive table")
+
+# columns both tables share, in the same order
+_SHARED = [c.key for c in Task.__table__.columns]
+
+
+def _columns(model):
+    return [getattr(model, key) for key in _SHARED]
+
+
+# Task and TaskArchive as one entity: Task.* attributes, over a UNION ALL
+all_tasks = aliased(Task, union_all(select(*_columns(Task)), select(*_columns(TaskArchive))).subquery("all_tasks"))
+
+
+def task_source(include_archived: bool):
+    """The entity list queries select from: the hot table, or both tables."""
+    return all_tasks if include_archived else Task
+
+
+# -------------------------------
+# Archival
+# -------------------------------
+def archive_batch(session: Session, cutoff, limit: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Move up to `limit` due tasks and commit; returns how many moved."""
+    candidates = (
+        select(Task.id)
+        .where(Task.status == "Completed", Task.completed_at < cutoff)
+        .limit(limit)
+    )
+    if session.get_bind().dialect.name == "postgresql":
+        # rows a writer holds are left for the next run instead of waited for
+        candidates = candidates.with_for_update(skip_locked=True)
+    ids = session.exec(candidates).scalars().all()
+    if not ids:
+        return 0
+
+    # the row as deleted is the row archived: a concurrent status change
+    # either lands first (and the row no longer matches) or waits for us
+    rows = session.exec(
+        delete(Task)
+        .where(Task.id.in_(ids), Task.status == "Completed", Task.completed_at < cutoff)
+        .returning(*_columns(Task))
+        .execution_options(synchronize_session=False)
+    ).all()
+    if rows:
+        now = utcnow()
+        session.exec(insert(TaskArchive), params=[{**r._mapping, "archived_at": now} for r in rows])
+        teams = dict(session.exec(
+            select(Project.id, Project.team_id).where(Project.id.in_({r.project_id for r in rows}))
+        ).all())
+        scopes = set()
+        for r in rows:
+            scopes |= versions.task_scopes(teams[r.project_id], [r])
+        versions.bump(session, scopes)
+        # gone from the hot lists that /sync mirrors
+        changes.record(session, "task", [r.id for r in rows], "delete")
+    session.commit()
+    TASKS_ARCHIVED.inc(len(rows))
+    return len(rows)
+
+
+def archive_completed(
+    engine,
+    older_than_days: float = ARCHIVE_AFTER_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    max_seconds: Optional[float] = None,
+) -> int:
+    """Archive batches until nothing is due (or `max_seconds` ran out); returns how many moved."""
+    cutoff = utcnow() - timedelta(days=older_than_days)
+    deadline = time.monotonic() + max_seconds if max_seconds is not None else None
+    moved = 0
+    with Session(engine) as session:
+        while True:
+            n = archive_batch(session, cutoff, batch_size)
+            moved += n
+            if n < batch_size or (deadline is not None and time.monotonic() >= deadline):
+                return moved
+            time.sleep(ARCHIVE_PAUSE)
+
+
+def status(engine, older_than_days: float = ARCHIVE_AFTER_DAYS) -> Dict[str, int]:
+    cutoff = utcnow() - timedelta(days=older_than_days)
+    with Session(engine) as session:
+        return {
+            "hot": session.exec(select(func.count()).select_from(Task)).scalar_one(),
+            "archived": session.exec(select(func.count()).select_from(TaskArchive)).scalar_one(),
+            "due": session.exec(
+                select(func.count()).where(Task.status == "Completed", Task.completed_at < cutoff)
+            ).scalar_one(),
+        }
+
+
+def main(argv) -> int:
+    from core.database import engine
+    from core.migrations import migrate
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", nargs="?", choices=("run", "status"), default="run")
+    parser.add_argument("--days", type=float, default=ARCHIVE_AFTER_DAYS, help="archive tasks completed before this")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    migrate(engine)
+    if args.command == "status":
+        print(status(engine, args.days))
+        return 0
+    start = time.perf_counter()
+    moved = archive_completed(engine, args.days, args.batch_size)
+    print(f"archived {moved} task(s) in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,93 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from core import changes, counters, versions
+from models.models import Project, Task, Team, TeamMemberLink, utcnow
+from schemas.project_schema import ProjectRead
+from schemas.task_schema import TaskRead
+
+# -------------------------------
+# Bulk write layer
+# -------------------------------
+# Plain functions over a sync Session: routes call them through
+# `await session.run_sync(...)` and commit once, scripts call them directly.
+# Rows go out as one multi-row INSERT ... RETURNING (batched by SQLAlchemy's
+# insertmanyvalues, executemany where RETURNING is unavailable), and the
+# response objects are built from the returned rows -- no refresh/re-read.
+# Every insert is also appended to the change log read by GET /sync.
+
+TASK_COLUMNS = (
+    Task.id, Task.title, Task.description, Task.status, Task.project_id, Task.assigned_to, Task.version
+)
+
+
+def task_columns(source) -> tuple:
+    """TASK_COLUMNS taken from another Task entity (e.g. archive.all_tasks)."""
+    return tuple(getattr(source, c.key) for c in TASK_COLUMNS)
+
+
+PROJECT_COLUMNS = (Project.id, Project.name, Project.description, Project.team_id, Project.created_by)
+
+
+def insert_project(
+    session: Session, name: str, description: Optional[str], team_id: int, created_by: int
+) -> ProjectRead:
+    row = session.exec(
+        insert(Project).returning(*PROJECT_COLUMNS),
+        params=[{
+            "name": name,
+            "description": description,
+            "team_id": team_id,
+            "created_by": created_by,
+        }],
+    ).one()
+    versions.bump(session, versions.project_scopes(team_id))
+    changes.record(session, "project", [row.id], "create")
+    return ProjectRead(**row._mapping)
+
+
+def insert_tasks(session: Session, rows: Iterable[Dict[str, Any]], team_id: int) -> List[TaskRead]:
+    """
+    Insert task rows (title, description, project_id, assigned_to[, status]) of
+    projects in team `team_id`, count them in the status counters and bump
+    their change versions.
+    """
+    # same keys in every row, NULLs rendered: otherwise rows with and without a
+    # description end up in separate INSERT batches, down to one row each
+    params = [{"status": "To-Do", "description": None, "completed_at": None, **row} for row in rows]
+    if not params:
+        return []
+    now = utcnow()
+    for p in params:
+        if p["status"] == "Completed" and p["completed_at"] is None:
+            p["completed_at"] = now
+    # every returned row carries its own values, so row order does not matter;
+    # asking for parameter order would force SQLite back to one INSERT per row
+    result = session.exec(
+        insert(Task).returning(*TASK_COLUMNS).execution_options(render_nulls=True), params=params
+    )
+    tasks = sorted((TaskRead(**r._mapping) for r in result), key=lambda t: t.id)
+    counters.apply_deltas(session, counters.new_task_deltas(team_id, tasks))
+    versions.bump(session, versions.task_scopes(team_id, tasks))
+    changes.record(session, "task", [t.id for t in tasks], "create")
+    return tasks
+
+
+def insert_team(session: Session, name: str, description: Optional[str], created_by: int) -> int:
+    team_id = session.exec(
+        insert(Team).returning(Team.id),
+        params=[{"name": name, "description": description, "created_by": created_by}],
+    ).scalar_one()
+    versions.bump(session, ["team"])
+    changes.record(session, "team", [team_id], "create")
+    return team_id
+
+
+def insert_team_members(session: Session, team_id: int, user_ids: Iterable[int]) -> None:
+    params = [{"team_id": team_id, "user_id": uid} for uid in user_ids]
+    if params:
+        session.exec(insert(TeamMemberLink), params=params)
+        versions.bump(session, ["team"])
+        changes.record(session, "team", [team_id], "update")
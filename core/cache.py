@@ -0,0 +1,158 @@
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from typing import Any, Hashable, Iterable, Optional, Tuple
+
+# Optional expiry (seconds) so separate uvicorn workers, which do not see each
+# other's invalidations, still converge. Unset means entries live until a write.
+_DEFAULT_TTL = os.getenv("READ_CACHE_TTL")
+
+
+class ResponseCache:
+    """
+    Small process-local LRU for assembled read responses.
+    Write routes call `invalidate()`; a generation counter makes sure a read
+    that started before the write cannot store its (now stale) result after it.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl if ttl is not None else (float(_DEFAULT_TTL) if _DEFAULT_TTL else None)
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, generation: int) -> None:
+        """Store `value` unless an invalidation happened since `generation` was read."""
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, keys: Iterable[Hashable]) -> None:
+        """Drop `keys`; like `invalidate()`, reads already in flight will not store."""
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._data.pop(key, None)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+
+
+class SharedFileCache:
+    """
+    The same get/set/discard contract as `ResponseCache`, kept in a small SQLite
+    file so every worker on the host reads and invalidates the same entries.
+    Values must be JSON serializable. Calls can wait up to the busy timeout
+    for another worker's write lock, so `blocking` tells async callers to run
+    them in the threadpool. The file is a cache: it can be deleted at any time.
+    """
+
+    blocking = True
+    # expired / surplus entries are swept every this many stores
+    _SWEEP_EVERY = 256
+
+    def __init__(self, path: str, maxsize: int = 10000, ttl: Optional[float] = None):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._local = threading.local()
+        self._stores = itertools.count(1)
+        with closing(self._connect()) as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (generation INTEGER NOT NULL)")
+            conn.execute("INSERT INTO meta SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM meta)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # autocommit; durability does not matter for a cache
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")
+        return conn
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must stay on the thread that opened them
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    @property
+    def generation(self) -> int:
+        return self._conn.execute("SELECT generation FROM meta").fetchone()[0]
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        row = self._conn.execute("SELECT value, stored_at FROM entries WHERE key = ?", (str(key),)).fetchone()
+        if row is None:
+            return None
+        if self.ttl is not None and time.time() - row[1] > self.ttl:
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: Hashable, value: Any, generation: int) -> None:
+        """Store `value` unless an invalidation happened since `generation` was read."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, stored_at) "
+            "SELECT ?, ?, ? WHERE (SELECT generation FROM meta) = ?",
+            (str(key), json.dumps(value), time.time(), generation),
+        )
+        if next(self._stores) % self._SWEEP_EVERY == 0:
+            self._sweep()
+
+    def _sweep(self) -> None:
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM entries WHERE stored_at < ?", (time.time() - self.ttl,))
+        self._conn.execute(
+            "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+            (self.maxsize,),
+        )
+
+    def discard(self, keys: Iterable[Hashable]) -> None:
+        self._bump_generation("DELETE FROM entries WHERE key = ?", [(str(k),) for k in keys])
+
+    def invalidate(self) -> None:
+        self._bump_generation("DELETE FROM entries", [()])
+
+    def _bump_generation(self, delete: str, params: list) -> None:
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("UPDATE meta SET generation = generation + 1")
+            conn.executemany(delete, params)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+# Assembled /teams_list pages; cleared by create_team and membership changes
+teams_cache = ResponseCache()
@@ -0,0 +1,98 @@
+import os
+import time
+from typing import Iterable
+
+from sqlalchemy import delete, event, func, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session
+
+from models.models import ChangeLog, ChangeVersion
+
+# -------------------------------
+# Change log
+# -------------------------------
+# Write paths append (entity, id, op) rows in their own transaction; GET /sync
+# replays everything after a client's last seq. Entries older than the
+# retention are compacted away by the worker, and a client whose cursor is
+# older than that is told to refetch everything.
+
+ENTITIES = ("task", "project", "team", "user")
+CHANGELOG_RETENTION = float(os.getenv("CHANGELOG_RETENTION_SECONDS", str(30 * 24 * 3600)))
+
+# ChangeVersion row whose version holds the highest seq compacted away
+COMPACTED_SCOPE = "changelog:compacted"
+
+# Postgres hands out seqs at insert but makes them visible at commit, so two
+# writers could become visible out of order and a reader would skip the lower
+# seq for good. Appenders take this transaction lock, which makes commit order
+# follow seq order. (SQLite already has a single writer.)
+_APPEND_LOCK_KEY = 0x6368616E  # "chan"
+
+# session.info key of the entries waiting for the transaction's commit
+_PENDING = "changes.pending"
+
+
+def record(session: Session, entity: str, ids: Iterable[int], op: str) -> None:
+    """
+    Queue one entry per id; they are appended as the caller's transaction
+    commits, and dropped if it rolls back. On Postgres the append takes the
+    global lock above, so it is left to the last moment: only the insert of
+    the entries and the commit itself run one transaction at a time, not the
+    rest of the writer's work. That is the price of the ordered feed: write
+    commits on Postgres are serialized across all entities.
+    """
+    now = time.time()
+    session.connection()  # begin the transaction, so a rollback is seen below
+    session.info.setdefault(_PENDING, []).extend(
+        {"entity": entity, "entity_id": i, "op": op, "created_at": now} for i in ids
+    )
+
+
+@event.listens_for(OrmSession, "before_commit")
+def _append_pending(session: OrmSession) -> None:
+    params = session.info.pop(_PENDING, None)
+    if not params:
+        return
+    if session.get_bind().dialect.name == "postgresql":
+        session.execute(text("SELECT pg_advisory_xact_lock(:key)").bindparams(key=_APPEND_LOCK_KEY))
+    session.execute(insert(ChangeLog), params)
+
+
+@event.listens_for(OrmSession, "after_soft_rollback")
+def _drop_pending(session: OrmSession, previous_transaction) -> None:
+    # also when nothing had reached the database yet; not for a savepoint
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING, None)
+
+
+def compact(engine: Engine, retention: float = CHANGELOG_RETENTION) -> int:
+    """Delete entries older than `retention` seconds; returns the new compacted seq."""
+    cutoff = time.time() - retention
+    with engine.begin() as conn:
+        # seqs grow with time, so the first recent entry marks the cut (no index needed)
+        first_kept = conn.execute(
+            select(ChangeLog.seq).where(ChangeLog.created_at >= cutoff).order_by(ChangeLog.seq).limit(1)
+        ).scalar()
+        if first_kept is None:
+            first_kept = (conn.execute(select(func.max(ChangeLog.seq))).scalar() or 0) + 1
+        floor = first_kept - 1
+        current = compacted_seq(conn)
+        if floor <= current:
+            return current
+        conn.execute(delete(ChangeLog).where(ChangeLog.seq <= floor))
+        now = time.time()
+        stmt = (pg_insert if engine.dialect.name == "postgresql" else sqlite_insert)(ChangeVersion)
+        conn.execute(stmt.values(scope=COMPACTED_SCOPE, version=floor, updated_at=now).on_conflict_do_update(
+            index_elements=["scope"], set_={"version": floor, "updated_at": now},
+        ))
+    return floor
+
+
+def compacted_seq(conn) -> int:
+    """Highest seq removed by compaction (0 before the first compaction)."""
+    return conn.execute(
+        select(ChangeVersion.version).where(ChangeVersion.scope == COMPACTED_SCOPE)
+    ).scalar() or 0
@@ -0,0 +1,129 @@
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+
+# -------------------------------
+# Encoders
+# -------------------------------
+class _Gzip:
+    name = "gzip"
+
+    def __init__(self, level: int):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._z.compress(data)
+
+    def finish(self) -> bytes:
+        return self._z.flush()
+
+
+class _Brotli:
+    name = "br"
+
+    def __init__(self, quality: int):
+        self._c = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+# Bodies that are compressed already (e.g. a .csv.gz download)
+_COMPRESSED_TYPES = ("application/gzip", "application/x-gzip", "application/zip", "image/", "video/", "audio/")
+
+
+def _accepted(accept_encoding: str) -> set:
+    codings = set()
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        codings.add(coding.strip())
+    return codings
+
+
+# -------------------------------
+# Middleware
+# -------------------------------
+class CompressionMiddleware:
+    """
+    Brotli (when the `brotli` package is installed) or gzip for response bodies
+    of at least `minimum_size` bytes. Streamed bodies are compressed chunk by
+    chunk; event streams, already compressed media types and responses that
+    already carry a Content-Encoding pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _encoder(self, accept_encoding: str):
+        codings = _accepted(accept_encoding)
+        if brotli is not None and "br" in codings:
+            return _Brotli(self.brotli_quality)
+        if "gzip" in codings:
+            return _Gzip(self.gzip_level)
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoder = self._encoder(Headers(scope=scope).get("accept-encoding", ""))
+        if encoder is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        active = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, active
+            if message["type"] == "http.response.start":
+                # held back until the first body chunk shows whether to compress
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(raw=start["headers"])
+                content_type = headers.get("content-type", "")
+                active = not (
+                    "content-encoding" in headers
+                    or content_type.startswith("text/event-stream")
+                    or content_type.startswith(_COMPRESSED_TYPES)
+                    or (not more_body and len(body) < self.minimum_size)
+                )
+                if active:
+                    headers["Content-Encoding"] = encoder.name
+                    headers.add_vary_header("Accept-Encoding")
+                    del headers["Content-Length"]
+                    body = encoder.compress(body) + (b"" if more_body else encoder.finish())
+                    if not more_body:
+                        headers["Content-Length"] = str(len(body))
+                    message = {**message, "body": body}
+                await send(start)
+                start = None
+            elif active:
+                body = encoder.compress(body) + (b"" if more_body else encoder.finish())
+                message = {**message, "body": body}
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,121 @@
+"""
+Incrementally maintained task-status counters.
+
+Write routes pass the status changes they make to `apply_deltas` inside their
+own transaction, so the counters commit (or roll back) together with the tasks.
+
+    python -m core.counters verify     # recompute with GROUP BY, report drift (exit 1 on drift)
+    python -m core.counters rebuild    # replace the counter table with the recomputed values
+"""
+import sys
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import delete, func, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select
+
+from core.archive import all_tasks
+from models.models import Project, TaskStatusCounter
+
+# (team_id, project_id, assigned_to, status)
+CounterKey = Tuple[int, int, int, str]
+
+
+def new_task_deltas(team_id: int, tasks: Iterable) -> Counter:
+    """+1 per created task; `tasks` only needs project_id, assigned_to and status."""
+    return Counter((team_id, t.project_id, t.assigned_to, t.status) for t in tasks)
+
+
+def status_change_deltas(changes: Iterable[Tuple[int, int, int, str, str]]) -> Counter:
+    """(team_id, project_id, assigned_to, old_status, new_status) -> -1 old, +1 new."""
+    deltas: Counter = Counter()
+    for team_id, project_id, assigned_to, old, new in changes:
+        if old != new:
+            deltas[(team_id, project_id, assigned_to, old)] -= 1
+            deltas[(team_id, project_id, assigned_to, new)] += 1
+    return deltas
+
+
+def apply_deltas(session: Session, deltas: Dict[CounterKey, int]) -> None:
+    """Upsert `count = count + delta` for every non-zero key, in the caller's transaction."""
+    params = [
+        {"team_id": k[0], "project_id": k[1], "assigned_to": k[2], "status": k[3], "count": d}
+        for k, d in deltas.items()
+        if d
+    ]
+    if not params:
+        return
+    dialect = session.get_bind().dialect.name
+    stmt = (pg_insert if dialect == "postgresql" else sqlite_insert)(TaskStatusCounter)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["team_id", "project_id", "assigned_to", "status"],
+        set_={"count": TaskStatusCounter.count + stmt.excluded["count"]},
+    )
+    session.exec(stmt, params=params)
+
+
+# -------------------------------
+# Rebuild / verify
+# -------------------------------
+def recompute(session: Session) -> Dict[CounterKey, int]:
+    # archived tasks still count: archiving moves rows, it does not remove work
+    t = all_tasks
+    rows = session.exec(
+        select(Project.team_id, t.project_id, t.assigned_to, t.status, func.count())
+        .join(Project, t.project_id == Project.id)
+        .group_by(Project.team_id, t.project_id, t.assigned_to, t.status)
+    ).all()
+    return {(r[0], r[1], r[2], r[3]): r[4] for r in rows}
+
+
+def stored(session: Session) -> Dict[CounterKey, int]:
+    rows = session.exec(select(TaskStatusCounter)).all()
+    return {(r.team_id, r.project_id, r.assigned_to, r.status): r.count for r in rows if r.count}
+
+
+def drift(session: Session) -> List[Tuple[CounterKey, int, int]]:
+    """(key, stored, actual) for every counter that disagrees with the task table."""
+    actual, have = recompute(session), stored(session)
+    return [
+        (key, have.get(key, 0), actual.get(key, 0))
+        for key in sorted(set(actual) | set(have), key=str)
+        if have.get(key, 0) != actual.get(key, 0)
+    ]
+
+
+def rebuild(session: Session) -> int:
+    actual = recompute(session)
+    session.exec(delete(TaskStatusCounter))
+    if actual:
+        session.exec(insert(TaskStatusCounter), params=[
+            {"team_id": k[0], "project_id": k[1], "assigned_to": k[2], "status": k[3], "count": n}
+            for k, n in actual.items()
+        ])
+    session.commit()
+    return len(actual)
+
+
+def main(argv: List[str]) -> int:
+    from core.database import engine
+    from core.migrations import migrate
+
+    command = argv[0] if argv else "verify"
+    migrate(engine)
+    with Session(engine) as session:
+        if command == "verify":
+            problems = drift(session)
+            for key, have, actual in problems:
+                print(f"drift {key}: stored={have} actual={actual}")
+            print(f"{len(problems)} counter(s) drifted" if problems else "counters match")
+            return 1 if problems else 0
+        if command == "rebuild":
+            print(f"rebuilt {rebuild(session)} counter row(s)")
+            return 0
+    print(__doc__)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
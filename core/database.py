@@ -1,21 +1,247 @@
-from sqlmodel import SQLModel, create_engine, Session
-from typing import Generator
+from sqlmodel import create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.concurrency import run_in_threadpool
+from typing import Any, AsyncGenerator, Callable, Dict, Generator, Iterator, Optional, Union
+from contextlib import contextmanager
+from contextvars import ContextVar
 import os
+import threading
+
+from core.instrumentation import instrument_engine
 
 # Use env DATABASE_URL with fallback to local sqlite
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./team_collab.db")
 
+# "sync"  -> blocking driver (sqlite3/psycopg2), each session call runs in the threadpool
+# "async" -> async driver (aiosqlite/asyncpg), session calls are awaited on the event loop
+DB_MODE = os.getenv("DB_MODE", "sync").lower()
+
+
+# -------------------------------
+# Engine profiles
+# -------------------------------
+# DB_PROFILE picks a preset; any DB_POOL_* / SQLITE_* variable overrides a single value.
+ENGINE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "small": {"pool_size": 5, "max_overflow": 5, "pool_timeout": 10, "pool_recycle": 1800},
+    "default": {"pool_size": 10, "max_overflow": 20, "pool_timeout": 30, "pool_recycle": 1800},
+    "large": {"pool_size": 30, "max_overflow": 30, "pool_timeout": 30, "pool_recycle": 900},
+}
+DB_PROFILE = os.getenv("DB_PROFILE", "default").lower()
+
+# Applied to every new SQLite connection (WAL lets readers run alongside the writer)
+SQLITE_PRAGMAS: Dict[str, str] = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"),
+    "cache_size": os.getenv("SQLITE_CACHE_SIZE", "-20000"),     # negative = KiB
+    "mmap_size": os.getenv("SQLITE_MMAP_SIZE", "268435456"),
+}
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """Keyword arguments for create_engine / create_async_engine for `url`."""
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith("sqlite:")):
+        # in-memory databases live on a single connection; pool settings do not apply
+        return {}
+    if DB_PROFILE not in ENGINE_PROFILES:
+        raise RuntimeError(f"Unknown DB_PROFILE {DB_PROFILE!r}, expected one of {sorted(ENGINE_PROFILES)}")
+    profile = ENGINE_PROFILES[DB_PROFILE]
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", profile["pool_size"])),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", profile["max_overflow"])),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", profile["pool_timeout"])),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", profile["pool_recycle"])),
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True),
+    }
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        if value:
+            cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+class PoolStats:
+    """Checkout counters for one engine's pool, fed by pool events."""
+
+    def __init__(self, sync_engine: Engine):
+        self.engine = sync_engine
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.total_checkouts = 0
+        self._lock = threading.Lock()
+        event.listen(sync_engine, "checkout", self._on_checkout)
+        event.listen(sync_engine, "checkin", self._on_checkin)
+
+    def _on_checkout(self, *args) -> None:
+        with self._lock:
+            self.checked_out += 1
+            self.total_checkouts += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def _on_checkin(self, *args) -> None:
+        with self._lock:
+            self.checked_out = max(self.checked_out - 1, 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        pool = self.engine.pool
+        stats: Dict[str, Any] = {
+            "pool": type(pool).__name__,
+            "checked_out": self.checked_out,
+            "peak_checked_out": self.peak_checked_out,
+            "total_checkouts": self.total_checkouts,
+        }
+        # QueuePool-style pools expose their sizing; others (Static/Null) do not
+        for name in ("size", "checkedin", "overflow"):
+            fn = getattr(pool, name, None)
+            if callable(fn):
+                stats[name] = fn()
+        if hasattr(pool, "_max_overflow"):
+            stats["max_overflow"] = pool._max_overflow
+        return stats
+
+
+def _configure(sync_engine: Engine) -> PoolStats:
+    if sync_engine.dialect.name == "sqlite":
+        event.listen(sync_engine, "connect", _apply_sqlite_pragmas)
+    instrument_engine(sync_engine)
+    return PoolStats(sync_engine)
+
+
 # create engine that will be shared by the app
-engine = create_engine(DATABASE_URL, echo=False)
+engine = create_engine(DATABASE_URL, echo=False, **engine_options(DATABASE_URL))
+pool_stats = {"sync": _configure(engine)}
+
+
+def _async_url(url: str) -> str:
+    """Swap the sync driver in `url` for its async counterpart."""
+    for prefix, async_prefix in (
+        ("sqlite://", "sqlite+aiosqlite://"),
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgres://", "postgresql+asyncpg://"),
+    ):
+        if url.startswith(prefix):
+            return async_prefix + url[len(prefix):]
+    return url
+
+
+# only built when asked for, so the sync mode does not need the async drivers
+async_engine = None
+if DB_MODE == "async":
+    async_engine = create_async_engine(
+        _async_url(DATABASE_URL), echo=False, **engine_options(DATABASE_URL)
+    )
+    pool_stats["async"] = _configure(async_engine.sync_engine)
 
-def create_db_and_tables() -> None:
-    """
-    Create all DB tables from SQLModel metadata.
-    Call this at startup.
-    """
-    SQLModel.metadata.create_all(engine)
+
+def pool_status() -> Dict[str, Any]:
+    """Pool checkout/overflow figures per engine, reported by /health."""
+    return {name: stats.snapshot() for name, stats in pool_stats.items()}
 
 # Dependency to get DB session for FastAPI route dependencies
 def get_session() -> Generator[Session, None, None]:
     with Session(engine) as session:
         yield session
+
+
+# -------------------------------
+# Async session used by the route handlers
+# -------------------------------
+class ThreadedSession:
+    """
+    Awaitable facade over a sync `Session` with the same call shape as `AsyncSession`,
+    so handlers are written once and `DB_MODE` only decides which one they get.
+    Every call that may touch the database runs in the threadpool; rows are
+    prebuffered there, exactly as `AsyncSession` does.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    def add(self, instance: Any) -> None:
+        self.sync_session.add(instance)
+
+    def add_all(self, instances: Any) -> None:
+        self.sync_session.add_all(instances)
+
+    def get_bind(self, *args: Any, **kwargs: Any):
+        return self.sync_session.get_bind(*args, **kwargs)
+
+    async def exec(self, statement: Any, *, execution_options: Optional[dict] = None, **kwargs: Any):
+        options = {**(execution_options or {}), "prebuffer_rows": True}
+        return await run_in_threadpool(
+            self.sync_session.exec, statement, execution_options=options, **kwargs
+        )
+
+    async def get(self, entity: Any, ident: Any, **kwargs: Any):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def refresh(self, instance: Any, **kwargs: Any) -> None:
+        await run_in_threadpool(self.sync_session.refresh, instance, **kwargs)
+
+    async def delete(self, instance: Any) -> None:
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self) -> None:
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def run_sync(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run `fn(sync_session, *args)` off the event loop, like `AsyncSession.run_sync`."""
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.sync_session.close)
+
+
+DbSession = Union[AsyncSession, ThreadedSession]
+
+# Set while POST /batch dispatches its sub-requests one after another, so they
+# all read through the batch's session (and its snapshot)
+_shared_session: ContextVar[Optional[DbSession]] = ContextVar("shared_db_session", default=None)
+
+
+@contextmanager
+def shared_session(session: DbSession) -> Iterator[None]:
+    """Hand `session` to every `get_async_session` dependency resolved inside the block."""
+    token = _shared_session.set(session)
+    try:
+        yield
+    finally:
+        _shared_session.reset(token)
+
+
+async def get_async_session() -> AsyncGenerator[DbSession, None]:
+    shared = _shared_session.get()
+    if shared is not None:
+        # owned (and closed) by whoever shared it
+        yield shared
+        return
+    # objects stay readable after commit without an implicit (blocking) reload
+    if async_engine is not None:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+        return
+    session = ThreadedSession(Session(engine, expire_on_commit=False))
+    try:
+        yield session
+    finally:
+        await session.close()
@@ -0,0 +1,129 @@
+import asyncio
+import itertools
+from abc import ABC, abstractmethod
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from pydantic import BaseModel
+
+from core.metrics import Counter, Gauge
+
+# Events buffered per subscriber before it is considered too slow
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "256"))
+
+EVENTS_PUBLISHED = Counter("events_published_total", "Task change events published", ["type"])
+EVENTS_DROPPED = Counter("events_dropped_total", "Events dropped because a subscriber fell behind")
+SUBSCRIBERS = Gauge("event_subscribers", "Open task change feed connections")
+
+
+class TaskEvent(BaseModel):
+    id: int                     # broker sequence number
+    type: str                   # task.created / task.status / resync
+    team_id: Optional[int] = None
+    task: Optional[Dict[str, Any]] = None
+    ts: float
+
+
+class Subscription:
+    """
+    One feed connection. Receives the events of its teams plus those of tasks
+    assigned to its user. The queue is bounded: a consumer that falls behind
+    loses its backlog and gets a single `resync` event telling it to refetch,
+    so one slow client can never make the publisher block or memory grow.
+    """
+
+    def __init__(self, team_ids: Iterable[int] = (), user_id: Optional[int] = None,
+                 maxsize: int = SUBSCRIBER_QUEUE_SIZE):
+        self.team_ids: Set[int] = set(team_ids)
+        self.user_id = user_id
+        self.queue: "asyncio.Queue[TaskEvent]" = asyncio.Queue(maxsize=maxsize)
+        self.lagged = False
+
+    def wants(self, event: TaskEvent) -> bool:
+        if event.team_id in self.team_ids:
+            return True
+        return self.user_id is not None and bool(event.task) and event.task.get("assigned_to") == self.user_id
+
+    def offer(self, event: TaskEvent) -> None:
+        if self.lagged:
+            EVENTS_DROPPED.inc()
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # throw the backlog away and leave only the resync marker; nothing
+            # else is queued until the consumer has read it
+            dropped = self.queue.qsize() + 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(TaskEvent(id=0, type="resync", ts=time.time()))
+            EVENTS_DROPPED.inc(dropped)
+            self.lagged = True
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[TaskEvent]:
+        """Next event (possibly a `resync` marker after an overflow), or None on timeout."""
+        try:
+            event = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if event.type == "resync":
+            self.lagged = False
+        return event
+
+
+# -------------------------------
+# Broker interface + in-process implementation
+# -------------------------------
+class Broker(ABC):
+    """
+    Fan-out interface used by the routes. The in-process broker below only
+    reaches subscribers of the same worker; a multi-worker deployment plugs in
+    an implementation that relays `publish` through shared infrastructure
+    (Redis pub/sub, Postgres LISTEN/NOTIFY) and delivers locally with `_deliver`.
+    """
+
+    def __init__(self):
+        self.subscriptions: List[Subscription] = []
+        self._seq = itertools.count(1)
+
+    def subscribe(self, team_ids: Iterable[int] = (), user_id: Optional[int] = None) -> Subscription:
+        sub = Subscription(team_ids, user_id)
+        self.subscriptions.append(sub)
+        SUBSCRIBERS.inc()
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        if sub in self.subscriptions:
+            self.subscriptions.remove(sub)
+            SUBSCRIBERS.dec()
+
+    def _deliver(self, event: TaskEvent) -> None:
+        for sub in list(self.subscriptions):
+            if sub.wants(event):
+                sub.offer(event)
+
+    @abstractmethod
+    async def publish(self, type: str, team_id: int, task: Dict[str, Any]) -> None:
+        """Send the event to every subscriber of every worker."""
+
+
+class InProcessBroker(Broker):
+    async def publish(self, type: str, team_id: int, task: Dict[str, Any]) -> None:
+        EVENTS_PUBLISHED.inc(labels=(type,))
+        self._deliver(TaskEvent(id=next(self._seq), type=type, team_id=team_id, task=task, ts=time.time()))
+
+
+_BROKERS = {"memory": InProcessBroker}
+broker: Broker = _BROKERS[os.getenv("EVENT_BROKER", "memory")]()
+
+
+def set_broker(new_broker: Broker) -> None:
+    """Swap the process-wide broker (e.g. for a cross-worker implementation)."""
+    global broker
+    broker = new_broker
+
+
+async def publish_tasks(type: str, team_id: int, tasks: Iterable[BaseModel]) -> None:
+    for task in tasks:
+        await broker.publish(type, team_id, task.model_dump())
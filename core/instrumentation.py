@@ -0,0 +1,158 @@
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.metrics import Counter, Histogram
+
+logger = logging.getLogger("app.sql")
+
+# Statements slower than this are logged with their parameters (0 turns it off)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# The same statement run this many times in one request is reported as an N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+# Logged parameters are cut to this many characters
+LOG_PARAMS_CHARS = 500
+
+# Label for requests no route matched (keeps 404 scans from creating new series)
+UNMATCHED = "<unmatched>"
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Request latency from first byte in to last byte out", ["method", "route"]
+)
+REQUESTS = Counter("http_requests_total", "Requests handled", ["method", "route", "status"])
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed per request", ["route"], buckets=QUERY_COUNT_BUCKETS
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per request", ["route"]
+)
+QUERY_DURATION = Histogram("db_query_duration_seconds", "SQL statement execution time")
+SLOW_QUERIES = Counter("db_slow_queries_total", "SQL statements slower than SLOW_QUERY_MS")
+N_PLUS_ONE = Counter(
+    "db_n_plus_one_total", "Requests that repeated one statement N_PLUS_ONE_THRESHOLD or more times", ["route"]
+)
+
+
+class RequestStats:
+    """SQL issued while handling one request (shared by every thread/greenlet it uses)."""
+
+    __slots__ = ("queries", "db_time", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements: Dict[str, int] = {}
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_sql_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+# -------------------------------
+# Cursor hooks
+# -------------------------------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    QUERY_DURATION.observe(elapsed)
+
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += elapsed
+        # compiled statements are cached, so this hashes the same str object each time
+        stats.statements[statement] = stats.statements.get(statement, 0) + 1
+
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        SLOW_QUERIES.inc()
+        shown = repr(parameters)
+        if len(shown) > LOG_PARAMS_CHARS:
+            shown = shown[:LOG_PARAMS_CHARS] + "..."
+        logger.warning("slow query (%.1f ms%s): %s -- params %s",
+                       elapsed * 1000, ", executemany" if executemany else "", statement, shown)
+
+
+def instrument_engine(sync_engine: Engine) -> None:
+    """Time and count every statement `sync_engine` (or the async engine around it) runs."""
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# -------------------------------
+# Middleware
+# -------------------------------
+class InstrumentationMiddleware:
+    """
+    Per-route latency, status, query count and database time. Routes are
+    labelled by their path template (`/tasks/{task_id}/status`), so the number
+    of series stays fixed however many ids are requested. Streamed responses
+    are timed until their last chunk has been sent.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._templates: Dict[Callable[..., Any], str] = {}
+
+    def _route(self, scope: Scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED
+        template = self._templates.get(endpoint)
+        if template is None:
+            # the router fills in `endpoint`; map it back to the path it was declared with
+            for route in scope["app"].routes:
+                if hasattr(route, "endpoint") and hasattr(route, "path_format"):
+                    self._templates.setdefault(route.endpoint, route.path_format)
+            template = self._templates.setdefault(endpoint, UNMATCHED)
+        return template
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _current.reset(token)
+            elapsed = time.perf_counter() - start
+            method, route = scope["method"], self._route(scope)
+            REQUEST_DURATION.observe(elapsed, labels=(method, route))
+            REQUESTS.inc(labels=(method, route, str(status)))
+            REQUEST_QUERIES.observe(stats.queries, labels=(route,))
+            REQUEST_DB_TIME.observe(stats.db_time, labels=(route,))
+            self._check_repeats(method, route, stats)
+
+    def _check_repeats(self, method: str, route: str, stats: RequestStats) -> None:
+        if not stats.statements or stats.queries < N_PLUS_ONE_THRESHOLD:
+            return
+        statement, times = max(stats.statements.items(), key=lambda item: item[1])
+        if times >= N_PLUS_ONE_THRESHOLD:
+            N_PLUS_ONE.inc(labels=(route,))
+            logger.warning("possible N+1 in %s %s: statement ran %d times (%d queries, %.1f ms in SQL): %s",
+                           method, route, times, stats.queries, stats.db_time * 1000, statement)
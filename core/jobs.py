@@ -0,0 +1,219 @@
+import json
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, select, update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from core.database import DbSession
+from core.metrics import Counter, Histogram
+from models.models import Job
+from schemas.job_schema import JobRead
+
+# A claimed job is handed to another worker if it has not finished after this
+# many seconds (the worker died, or the job hangs); keep it above the longest job
+JOB_VISIBILITY_TIMEOUT = float(os.getenv("JOB_VISIBILITY_TIMEOUT", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Retry n waits JOB_RETRY_BACKOFF * 2**(n-1) seconds
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", "5"))
+# Finished jobs are kept this long for /jobs/{id}, then deleted by the worker
+JOB_RETENTION = float(os.getenv("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+MAX_ERROR_CHARS = 2000
+
+JOBS_ENQUEUED = Counter("jobs_enqueued_total", "Background jobs enqueued", ["kind"])
+JOBS_FINISHED = Counter("jobs_finished_total", "Background job attempts by outcome", ["kind", "outcome"])
+JOB_DURATION = Histogram("job_duration_seconds", "Background job run time per attempt", ["kind"])
+
+# handler(session, payload) -> JSON-able result; runs in the worker process
+Handler = Callable[[DbSession, Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+HANDLERS: Dict[str, Handler] = {}
+
+# id of the job the worker is running (None elsewhere); see record_result
+current_job: ContextVar[Optional[int]] = ContextVar("current_job", default=None)
+
+
+def handler(kind: str) -> Callable[[Handler], Handler]:
+    """Register the coroutine that runs jobs of `kind`."""
+    def register(fn: Handler) -> Handler:
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def job_read(job: Job) -> JobRead:
+    return JobRead(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,
+        attempts=job.attempts,
+        max_attempts=job.max_attempts,
+        result=json.loads(job.result) if job.result else None,
+        error=job.error,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+    )
+
+
+# -------------------------------
+# Producer side (routes)
+# -------------------------------
+def enqueue(session: Session, kind: str, payload: Dict[str, Any], max_attempts: int = JOB_MAX_ATTEMPTS) -> Job:
+    """Add a job in the caller's transaction; it becomes visible to workers on commit."""
+    if kind not in HANDLERS:
+        raise ValueError(f"no job handler registered for {kind!r}")
+    now = time.time()
+    job = Job(
+        kind=kind,
+        payload=json.dumps(payload),
+        max_attempts=max_attempts,
+        available_at=now,
+        created_at=now,
+        updated_at=now,
+    )
+    session.add(job)
+    session.flush()
+    JOBS_ENQUEUED.inc(labels=(kind,))
+    return job
+
+
+async def accepted(session: DbSession, kind: str, payload: Dict[str, Any], **kwargs: Any) -> JSONResponse:
+    """Enqueue and answer 202 Accepted with the job and a Location to poll."""
+    job = await session.run_sync(enqueue, kind, payload, **kwargs)
+    await session.commit()
+    return JSONResponse(
+        job_read(job).model_dump(),
+        status_code=status.HTTP_202_ACCEPTED,
+        headers={"Location": f"/jobs/{job.id}"},
+    )
+
+
+# -------------------------------
+# Consumer side (worker)
+# -------------------------------
+class ClaimedJob(NamedTuple):
+    id: int
+    kind: str
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+
+
+def claim(engine: Engine, worker_id: str) -> Optional[ClaimedJob]:
+    """
+    Atomically take the next due job: a queued one, or a running one whose claim
+    expired. One UPDATE ... WHERE id = (next due id) does the claim, so two
+    workers can never both win it (SQLite serializes writers; Postgres skips
+    rows another worker has locked and re-checks the WHERE after waiting).
+    """
+    now = time.time()
+    due = (
+        Job.status.in_(("queued", "running")),
+        Job.available_at <= now,
+        Job.attempts < Job.max_attempts,
+    )
+    candidate = select(Job.id).where(*due).order_by(Job.available_at, Job.id).limit(1)
+    if engine.dialect.name == "postgresql":
+        candidate = candidate.with_for_update(skip_locked=True)
+    with engine.begin() as conn:
+        row = conn.execute(
+            update(Job)
+            .where(Job.id == candidate.scalar_subquery(), *due)
+            .values(
+                status="running",
+                attempts=Job.attempts + 1,
+                available_at=now + JOB_VISIBILITY_TIMEOUT,
+                locked_by=worker_id,
+                updated_at=now,
+            )
+            .returning(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts)
+        ).first()
+    if row is None:
+        return None
+    return ClaimedJob(row.id, row.kind, json.loads(row.payload), row.attempts, row.max_attempts)
+
+
+def _owned(job: ClaimedJob, worker_id: str):
+    # the claim is still ours: it did not expire and get re-claimed meanwhile
+    return (Job.id == job.id, Job.status == "running", Job.locked_by == worker_id, Job.attempts == job.attempts)
+
+
+def complete(engine: Engine, job: ClaimedJob, worker_id: str, result: Optional[Dict[str, Any]]) -> bool:
+    """Mark the job succeeded; False when the claim had already expired."""
+    with engine.begin() as conn:
+        done = conn.execute(
+            update(Job).where(*_owned(job, worker_id)).values(
+                status="succeeded",
+                result=json.dumps(result) if result is not None else None,
+                error=None,
+                locked_by=None,
+                updated_at=time.time(),
+            )
+        ).rowcount
+    JOBS_FINISHED.inc(labels=(job.kind, "succeeded" if done else "expired"))
+    return bool(done)
+
+
+def fail(engine: Engine, job: ClaimedJob, worker_id: str, error: str) -> bool:
+    """Schedule a retry with exponential backoff, or give up after max_attempts."""
+    now = time.time()
+    retry = job.attempts < job.max_attempts
+    with engine.begin() as conn:
+        done = conn.execute(
+            update(Job).where(*_owned(job, worker_id)).values(
+                status="queued" if retry else "failed",
+                available_at=now + JOB_RETRY_BACKOFF * 2 ** (job.attempts - 1) if retry else now,
+                error=error[:MAX_ERROR_CHARS],
+                locked_by=None,
+                updated_at=now,
+            )
+        ).rowcount
+    JOBS_FINISHED.inc(labels=(job.kind, "retried" if retry else "failed"))
+    return bool(done)
+
+
+def reap(engine: Engine) -> int:
+    """Fail running jobs whose last allowed attempt timed out; returns how many."""
+    now = time.time()
+    with engine.begin() as conn:
+        return conn.execute(
+            update(Job)
+            .where(Job.status == "running", Job.available_at <= now, Job.attempts >= Job.max_attempts)
+            .values(status="failed", error="visibility timeout expired", locked_by=None, updated_at=now)
+        ).rowcount
+
+
+async def record_result(session: DbSession, result: Dict[str, Any]) -> None:
+    """
+    Store the running job's result in the handler's own transaction, so it
+    commits together with the job's work. A handler whose work must not be
+    repeated checks `recorded_result` first: an attempt re-run after the
+    worker died between that commit and `complete` then finds it.
+    """
+    job_id = current_job.get()
+    if job_id is None:
+        return
+    await session.run_sync(lambda s: s.exec(
+        update(Job).where(Job.id == job_id).values(result=json.dumps(result))
+    ))
+
+
+async def recorded_result(session: DbSession) -> Optional[Dict[str, Any]]:
+    """The result an earlier attempt of the running job committed, if any."""
+    job_id = current_job.get()
+    if job_id is None:
+        return None
+    raw = await session.run_sync(lambda s: s.exec(select(Job.result).where(Job.id == job_id)).scalar())
+    return json.loads(raw) if raw else None
+
+
+def purge(engine: Engine) -> int:
+    """Delete finished jobs older than JOB_RETENTION; returns how many."""
+    with engine.begin() as conn:
+        return conn.execute(
+            delete(Job).where(Job.status.in_(("succeeded", "failed")), Job.updated_at < time.time() - JOB_RETENTION)
+        ).rowcount
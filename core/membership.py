@@ -0,0 +1,91 @@
+import hashlib
+import os
+import tempfile
+from typing import Callable, Dict, FrozenSet, Iterable
+
+from sqlmodel import select
+from starlette.concurrency import run_in_threadpool
+
+from core.cache import ResponseCache, SharedFileCache
+from core.database import DATABASE_URL, DbSession
+from core.metrics import Counter
+from models.models import TeamMemberLink
+
+# Entries expire after this many seconds even without an invalidation (a safety
+# net for membership edits made outside the app, e.g. by hand in the database)
+MEMBERSHIP_CACHE_TTL = float(os.getenv("MEMBERSHIP_CACHE_TTL", "300"))
+MEMBERSHIP_CACHE_SIZE = int(os.getenv("MEMBERSHIP_CACHE_SIZE", "10000"))
+
+# "memory" -> per-process LRU (one uvicorn worker)
+# "file"   -> SQLite file shared by every worker on the host, so an invalidation
+#             in one worker is seen by all of them
+MEMBERSHIP_CACHE = os.getenv("MEMBERSHIP_CACHE", "memory").lower()
+# one file per database, so two apps on one host never share entries
+MEMBERSHIP_CACHE_PATH = os.getenv("MEMBERSHIP_CACHE_PATH") or os.path.join(
+    tempfile.gettempdir(),
+    f"team-collab-membership-{hashlib.blake2b(DATABASE_URL.encode(), digest_size=6).hexdigest()}.sqlite",
+)
+
+MEMBERSHIP_LOOKUPS = Counter(
+    "membership_cache_lookups_total", "Team membership lookups by cache result", ["kind", "result"]
+)
+
+
+class MembershipCache:
+    """
+    team -> member user ids and user -> team ids, read through `backend`
+    (anything with the `ResponseCache` get/set/discard contract). Routes that
+    change membership call `invalidate()` after their commit. Backends that
+    set `blocking = True` (they do I/O) are called in the threadpool.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def _call(self, fn: Callable, *args):
+        if getattr(self.backend, "blocking", False):
+            return await run_in_threadpool(fn, *args)
+        return fn(*args)
+
+    async def _load(self, session: DbSession, kind: str, key_id: int, query) -> FrozenSet[int]:
+        key = f"{kind}:{key_id}"
+        cached = await self._call(self.backend.get, key)
+        if cached is not None:
+            MEMBERSHIP_LOOKUPS.inc(labels=(kind, "hit"))
+            return frozenset(cached)
+        MEMBERSHIP_LOOKUPS.inc(labels=(kind, "miss"))
+        generation = await self._call(lambda: self.backend.generation)
+        ids = frozenset((await session.exec(query)).all())
+        await self._call(self.backend.set, key, sorted(ids), generation)
+        return ids
+
+    async def team_members(self, session: DbSession, team_id: int) -> FrozenSet[int]:
+        return await self._load(session, "team", team_id, (
+            select(TeamMemberLink.user_id).where(TeamMemberLink.team_id == team_id)
+        ))
+
+    async def user_teams(self, session: DbSession, user_id: int) -> FrozenSet[int]:
+        return await self._load(session, "user", user_id, (
+            select(TeamMemberLink.team_id).where(TeamMemberLink.user_id == user_id)
+        ))
+
+    async def is_member(self, session: DbSession, team_id: int, user_id: int) -> bool:
+        return user_id in await self.team_members(session, team_id)
+
+    async def invalidate(self, team_ids: Iterable[int] = (), user_ids: Iterable[int] = ()) -> None:
+        """Forget the given teams and users (call after the membership change is committed)."""
+        await self._call(
+            self.backend.discard, [f"team:{t}" for t in team_ids] + [f"user:{u}" for u in user_ids]
+        )
+
+
+_BACKENDS: Dict[str, Callable[[], object]] = {
+    "memory": lambda: ResponseCache(maxsize=MEMBERSHIP_CACHE_SIZE, ttl=MEMBERSHIP_CACHE_TTL),
+    "file": lambda: SharedFileCache(MEMBERSHIP_CACHE_PATH, maxsize=MEMBERSHIP_CACHE_SIZE, ttl=MEMBERSHIP_CACHE_TTL),
+}
+memberships = MembershipCache(_BACKENDS[MEMBERSHIP_CACHE]())
+
+
+def set_backend(backend) -> None:
+    """Swap the process-wide membership backend (e.g. for a Redis-backed one)."""
+    memberships.backend = backend
@@ -0,0 +1,155 @@
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Every metric registers itself here so it can be reported in one place
+REGISTRY: List["_Metric"] = []
+
+# Latency buckets in seconds, from a cache hit up to a slow export
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, labels: LabelValues = ()) -> None:
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, labels: LabelValues = ()) -> None:
+        with self._lock:
+            self.values[labels] = value
+
+    def inc(self, amount: float = 1.0, labels: LabelValues = ()) -> None:
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, labels: LabelValues = ()) -> None:
+        self.inc(-amount, labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [count per bucket..., +Inf count], running sum
+        self.counts: Dict[LabelValues, List[int]] = {}
+        self.sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        with self._lock:
+            counts = self.counts.get(labels)
+            if counts is None:
+                counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+                self.sums[labels] = 0.0
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self.sums[labels] += value
+
+    def summary(self, labels: LabelValues = ()) -> Dict[str, float]:
+        """Count, mean and approximate p50/p95/p99 (bucket upper bounds)."""
+        with self._lock:
+            counts = list(self.counts.get(labels, ()))
+            total = self.sums.get(labels, 0.0)
+        n = sum(counts)
+        result = {"count": n, "mean": total / n if n else 0.0}
+        for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            result[name] = self._quantile(counts, n, q)
+        return result
+
+    def _quantile(self, counts: List[int], n: int, q: float) -> float:
+        if not n:
+            return 0.0
+        seen = 0
+        for i, c in enumerate(counts):
+            seen += c
+            if seen >= q * n:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+
+# -------------------------------
+# Prometheus text exposition (format 0.0.4)
+# -------------------------------
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def render(registry: Optional[Sequence[_Metric]] = None) -> str:
+    """Every registered metric in the Prometheus text format."""
+    lines: List[str] = []
+    for metric in REGISTRY if registry is None else registry:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        with metric._lock:
+            if isinstance(metric, Histogram):
+                series = [(k, list(v), metric.sums[k]) for k, v in metric.counts.items()]
+            else:
+                series = list(metric.values.items())
+        if isinstance(metric, Histogram):
+            for labels, counts, total in series:
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = f'le="{_number(bound)}"'
+                    lines.append(f"{metric.name}_bucket{_labels(metric.labelnames, labels, le)} {cumulative}")
+                lines.append(f"{metric.name}_sum{_labels(metric.labelnames, labels)} {_number(total)}")
+                lines.append(f"{metric.name}_count{_labels(metric.labelnames, labels)} {cumulative}")
+        else:
+            for labels, value in series:
+                lines.append(f"{metric.name}{_labels(metric.labelnames, labels)} {_number(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,348 @@
+"""
+Versioned schema migrations, applied at startup instead of `create_all`.
+
+    python -m core.migrations            # apply pending migrations
+    python -m core.migrations status     # list applied / pending versions
+    python -m core.migrations check-plans
+        # fail (exit 1) if a hot query's plan falls back to a full table scan
+        # or to sorting the whole result
+
+Every migration runs in its own transaction together with its row in
+`schema_migrations`, and is written to be idempotent (checkfirst / IF NOT
+EXISTS), so re-running it against a database that already has the change is
+harmless. Processes that start together (web + worker) take turns: the
+runner holds a Postgres advisory lock, and on SQLite each migration's
+transaction starts with BEGIN IMMEDIATE; pending versions are re-read under
+the lock.
+"""
+import sys
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, NamedTuple
+
+from sqlalchemy import (
+    Column, DateTime, Integer, MetaData, String, Table, func, insert, inspect, select, text,
+)
+from sqlalchemy.engine import Connection, Engine
+
+from models.models import (
+    ChangeLog, ChangeVersion, Job, Project, Task, TaskArchive, TaskStatusCounter, Team, TeamMemberLink, User,
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+
+
+_meta = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _meta,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+# -------------------------------
+# Idempotent building blocks
+# -------------------------------
+def create_tables(conn: Connection, *models: type) -> None:
+    for model in models:
+        model.__table__.create(conn, checkfirst=True)
+
+
+def create_indexes(conn: Connection, model: type, *names: str) -> None:
+    existing = {ix["name"] for ix in inspect(conn).get_indexes(model.__tablename__)}
+    for index in model.__table__.indexes:
+        if index.name in names and index.name not in existing:
+            index.create(conn)
+
+
+def add_column(conn: Connection, table: str, name: str, ddl: str) -> None:
+    if name not in {c["name"] for c in inspect(conn).get_columns(table)}:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+
+
+# -------------------------------
+# Migrations (append only -- never edit one that has shipped)
+# -------------------------------
+def _0001_baseline(conn: Connection) -> None:
+    create_tables(conn, User, Team, TeamMemberLink, Project, Task)
+
+
+def _0002_task_version(conn: Connection) -> None:
+    add_column(conn, "task", "version", "INTEGER NOT NULL DEFAULT 1")
+
+
+def _0003_hot_path_indexes(conn: Connection) -> None:
+    create_indexes(conn, Task, "ix_task_assigned_to_status", "ix_task_project_id_status")
+    create_indexes(conn, TeamMemberLink, "ix_teammemberlink_user_id")
+    create_indexes(conn, Project, "ix_project_team_id")
+
+
+def _0004_task_status_counters(conn: Connection) -> None:
+    create_tables(conn, TaskStatusCounter)
+    # seed from the existing tasks; afterwards the write routes keep it current
+    if not conn.execute(select(func.count()).select_from(TaskStatusCounter)).scalar():
+        conn.execute(insert(TaskStatusCounter).from_select(
+            ["team_id", "project_id", "assigned_to", "status", "count"],
+            select(Project.team_id, Task.project_id, Task.assigned_to, Task.status, func.count())
+            .join(Project, Task.project_id == Project.id)
+            .group_by(Project.team_id, Task.project_id, Task.assigned_to, Task.status),
+        ))
+
+
+def _0005_change_versions(conn: Connection) -> None:
+    create_tables(conn, ChangeVersion)
+
+
+# (table, indexed text columns) covered by /search
+_SEARCHABLE = (("task", ("title", "description")), ("project", ("name", "description")), ("team", ("name", "description")))
+
+
+def _search_index(conn: Connection, table: str, columns) -> None:
+    if conn.dialect.name == "postgresql":
+        # first column weighs more in ts_rank; the GIN index serves @@ queries
+        title, body = columns
+        conn.execute(text(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search tsvector GENERATED ALWAYS AS ("
+            f"setweight(to_tsvector('simple', coalesce({title}, '')), 'A') || "
+            f"setweight(to_tsvector('simple', coalesce({body}, '')), 'B')) STORED"
+        ))
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_search ON {table} USING gin (search)"))
+        return
+    # SQLite: external-content FTS5 tables (no second copy of the text), kept in
+    # step by triggers; prefix indexes make short "abc*" lookups cheap
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    fts = f"{table}_fts"
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{table}', "
+        f"content_rowid='id', prefix='2 3', tokenize='unicode61 remove_diacritics 2')"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END"
+    ))
+    conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def _0006_search_index(conn: Connection) -> None:
+    for table, columns in _SEARCHABLE:
+        _search_index(conn, table, columns)
+
+
+def _0007_job_queue(conn: Connection) -> None:
+    create_tables(conn, Job)
+
+
+def _0008_task_created_at(conn: Connection) -> None:
+    # existing tasks keep NULL: their creation time is unknown
+    add_column(conn, "task", "created_at", "TIMESTAMP")
+
+
+def _0009_change_log(conn: Connection) -> None:
+    create_tables(conn, ChangeLog)
+
+
+def _0010_task_archive(conn: Connection) -> None:
+    add_column(conn, "task", "completed_at", "TIMESTAMP")
+    # completion time of existing Completed tasks is unknown: count from now,
+    # so they become archivable ARCHIVE_AFTER_DAYS after this upgrade
+    conn.execute(text(
+        "UPDATE task SET completed_at = CURRENT_TIMESTAMP WHERE status = 'Completed' AND completed_at IS NULL"
+    ))
+    create_indexes(conn, Task, "ix_task_status_completed_at")
+    create_tables(conn, TaskArchive)
+
+
+def _0011_task_archive_search(conn: Connection) -> None:
+    # archived tasks stay searchable with /search?include_archived=true
+    _search_index(conn, "taskarchive", ("title", "description"))
+
+
+def _0012_keyset_indexes(conn: Connection) -> None:
+    create_indexes(conn, Task, "ix_task_assigned_to_id", "ix_task_project_id_id")
+    # superseded: on Postgres a single-column index does not return rows in id order
+    conn.execute(text("DROP INDEX IF EXISTS ix_taskarchive_assigned_to"))
+    conn.execute(text("DROP INDEX IF EXISTS ix_taskarchive_project_id"))
+    create_indexes(conn, TaskArchive, "ix_taskarchive_assigned_to_id", "ix_taskarchive_project_id_id")
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline", _0001_baseline),
+    Migration(2, "task_version", _0002_task_version),
+    Migration(3, "hot_path_indexes", _0003_hot_path_indexes),
+    Migration(4, "task_status_counters", _0004_task_status_counters),
+    Migration(5, "change_versions", _0005_change_versions),
+    Migration(6, "search_index", _0006_search_index),
+    Migration(7, "job_queue", _0007_job_queue),
+    Migration(8, "task_created_at", _0008_task_created_at),
+    Migration(9, "change_log", _0009_change_log),
+    Migration(10, "task_archive", _0010_task_archive),
+    Migration(11, "task_archive_search", _0011_task_archive_search),
+    Migration(12, "keyset_indexes", _0012_keyset_indexes),
+]
+
+
+# -------------------------------
+# Runner
+# -------------------------------
+# Serializes migrate() between processes (Postgres advisory lock key, "migr")
+_RUNNER_LOCK_KEY = 0x6D696772
+
+
+def applied_versions(engine: Engine) -> Dict[int, str]:
+    with engine.begin() as conn:
+        schema_migrations.create(conn, checkfirst=True)
+        return _applied(conn)
+
+
+def _applied(conn: Connection) -> Dict[int, str]:
+    rows = conn.execute(select(schema_migrations.c.version, schema_migrations.c.name)).all()
+    return {version: name for version, name in rows}
+
+
+def _begin_locked(conn: Connection) -> None:
+    if conn.dialect.name == "sqlite":
+        # the sqlite driver would start a deferred transaction at the first
+        # write (DDL not even then); take the database write lock up front
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def migrate(engine: Engine) -> List[Migration]:
+    """Apply every pending migration in order; returns the ones applied now."""
+    applied: List[Migration] = []
+    with engine.connect() as conn:
+        # the usual boot: nothing to do, no lock needed
+        if inspect(conn).has_table("schema_migrations") and set(_applied(conn)) >= {m.version for m in MIGRATIONS}:
+            return applied
+        conn.rollback()
+        postgres = engine.dialect.name == "postgresql"
+        if postgres:
+            # session level: held across the per-migration transactions below
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _RUNNER_LOCK_KEY})
+            conn.commit()
+        try:
+            for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+                _begin_locked(conn)
+                try:
+                    schema_migrations.create(conn, checkfirst=True)
+                    if migration.version in _applied(conn):
+                        conn.rollback()
+                        continue
+                    migration.upgrade(conn)
+                    conn.execute(schema_migrations.insert().values(
+                        version=migration.version,
+                        name=migration.name,
+                        applied_at=datetime.now(timezone.utc),
+                    ))
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    raise
+                applied.append(migration)
+        finally:
+            if postgres:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _RUNNER_LOCK_KEY})
+                conn.commit()
+    return applied
+
+
+# -------------------------------
+# Query-plan regression check
+# -------------------------------
+def hot_queries() -> Dict[str, object]:
+    """
+    The filtered queries behind the busiest endpoints; each must be served by
+    an index, and the keyset pages (ORDER BY id LIMIT n) must read it in order.
+    """
+    def page(query, id_column):
+        return query.where(id_column > 1).order_by(id_column).limit(101)
+
+    return {
+        "member_tasks": select(Task.id).where(Task.assigned_to == 1),
+        "member_tasks_by_status": select(Task.id).where(Task.assigned_to == 1, Task.status == "To-Do"),
+        "project_tasks": select(Task.id).where(Task.project_id == 1),
+        "project_tasks_by_status": select(Task.id).where(Task.project_id == 1, Task.status == "Completed"),
+        "team_projects": select(Project.id).where(Project.team_id == 1),
+        "membership_check": select(TeamMemberLink.user_id).where(
+            TeamMemberLink.team_id == 1, TeamMemberLink.user_id == 1
+        ),
+        "user_teams": select(TeamMemberLink.team_id).where(TeamMemberLink.user_id == 1),
+        "archive_candidates": select(Task.id).where(Task.status == "Completed", Task.completed_at < "2000-01-01"),
+        "archived_member_tasks": select(TaskArchive.id).where(TaskArchive.assigned_to == 1),
+        "member_tasks_page": page(select(Task.id).where(Task.assigned_to == 1), Task.id),
+        "project_tasks_page": page(select(Task.id).where(Task.project_id == 1), Task.id),
+        "archived_member_tasks_page": page(select(TaskArchive.id).where(TaskArchive.assigned_to == 1), TaskArchive.id),
+        "archived_project_tasks_page": page(select(TaskArchive.id).where(TaskArchive.project_id == 1), TaskArchive.id),
+    }
+
+
+def full_scans(engine: Engine) -> Dict[str, List[str]]:
+    """
+    Map of hot query name -> plan lines that scan a whole table or sort the
+    whole result (empty when all is well).
+    """
+    failures: Dict[str, List[str]] = {}
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            # on small tables Postgres prefers seq scans anyway; forbid them so
+            # a "Seq Scan" in the plan really means "no usable index"
+            conn.execute(text("SET enable_seqscan = off"))
+            conn.execute(text("SET enable_sort = off"))
+        for name, query in hot_queries().items():
+            sql = str(query.compile(engine, compile_kwargs={"literal_binds": True}))
+            if engine.dialect.name == "sqlite":
+                lines = [row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql))]
+                bad = [line for line in lines if line.startswith("SCAN") or "TEMP B-TREE" in line]
+            else:
+                lines = [row[0] for row in conn.execute(text("EXPLAIN " + sql))]
+                bad = [line for line in lines if "Seq Scan" in line or line.strip().startswith("Sort")]
+            if bad:
+                failures[name] = bad
+    return failures
+
+
+def main(argv: List[str]) -> int:
+    from core.database import engine
+
+    command = argv[0] if argv else "upgrade"
+    if command == "upgrade":
+        applied = migrate(engine)
+        for m in applied:
+            print(f"applied {m.version:04d} {m.name}")
+        if not applied:
+            print("schema is up to date")
+        return 0
+    if command == "status":
+        done = applied_versions(engine)
+        for m in MIGRATIONS:
+            print(f"{m.version:04d} {m.name:<24} {'applied' if m.version in done else 'pending'}")
+        return 0
+    if command == "check-plans":
+        migrate(engine)
+        failures = full_scans(engine)
+        for name, lines in failures.items():
+            print(f"FULL SCAN in {name}: {' | '.join(lines)}")
+        if not failures:
+            print(f"ok: {len(hot_queries())} hot queries use indexes")
+        return 1 if failures else 0
+    print(__doc__)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,121 @@
+import base64
+import json
+from typing import Any, Callable, Iterable, Iterator, List, Mapping, Optional
+
+from fastapi import HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
+
+from core.database import engine
+
+# Hard cap for one page, and how many rows the streaming mode pulls per fetch
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 500
+
+# Clients read the cursor for the next page from this header
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+# -------------------------------
+# Opaque cursor tokens
+# -------------------------------
+def encode_cursor(last_id: int) -> str:
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> int:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded.encode()))["id"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(400, "Invalid pagination cursor")
+    if not isinstance(last_id, int):
+        raise HTTPException(400, "Invalid pagination cursor")
+    return last_id
+
+
+# -------------------------------
+# Query parameters shared by every list endpoint
+# -------------------------------
+class PageParams:
+    """
+    `limit` + `after` select one keyset page ordered by id.
+    Without `limit` the whole list is returned, as before.
+    `stream=true` writes the JSON array row by row instead of building it in memory.
+    """
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+        after: Optional[str] = None,
+        stream: bool = False,
+    ):
+        self.limit = limit
+        self.after_id = decode_cursor(after) if after else None
+        self.stream = stream
+
+
+def apply_keyset(query, id_column, page: PageParams):
+    """Restrict `query` to the rows after the cursor, ordered by `id_column`."""
+    if page.after_id is not None:
+        query = query.where(id_column > page.after_id)
+    query = query.order_by(id_column)
+    if page.limit:
+        # fetch one extra row so we know whether another page exists
+        query = query.limit(page.limit + 1)
+    return query
+
+
+def trim_page(rows: List[Any], page: PageParams, response: Response) -> List[Any]:
+    """Drop the look-ahead row and expose the next cursor when there is more data."""
+    if page.limit and len(rows) > page.limit:
+        rows = rows[: page.limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].id)
+    return rows
+
+
+# -------------------------------
+# Streaming JSON array
+# -------------------------------
+def _json_array(chunks: Iterable[str]) -> Iterator[str]:
+    yield "["
+    first = True
+    for chunk in chunks:
+        yield chunk if first else "," + chunk
+        first = False
+    yield "]"
+
+
+async def stream_json_array(
+    session,
+    query,
+    id_column,
+    page: PageParams,
+    serialize: Callable[[Session, Any], str],
+    headers: Optional[Mapping[str, str]] = None,
+) -> StreamingResponse:
+    """
+    Stream `query` (as built by `apply_keyset`) as a JSON array without
+    materialising the result. Rows are pulled `STREAM_CHUNK_SIZE` at a time
+    through `yield_per`; the generator owns its own session because the
+    request session is closed before the body is sent.
+
+    With `limit`, the headers (and so the next cursor) go out before the
+    body: the page's ids are looked up first through `session`, and the
+    stream stops after `limit` rows.
+    """
+    headers = dict(headers or {})
+    if page.limit:
+        ids = (await session.exec(query.with_only_columns(id_column))).all()
+        if len(ids) > page.limit:
+            last = ids[page.limit - 1]
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(last if isinstance(last, int) else last[0])
+        query = query.limit(page.limit)
+
+    def body() -> Iterator[str]:
+        with Session(engine) as session:
+            rows = session.exec(query.execution_options(yield_per=STREAM_CHUNK_SIZE))
+            yield from _json_array(serialize(session, row) for row in rows)
+
+    return StreamingResponse(body(), media_type="application/json", headers=headers)
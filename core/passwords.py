@@ -0,0 +1,132 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+
+from core.metrics import Counter, Gauge, Histogram
+
+# Raising BCRYPT_ROUNDS makes older hashes "deprecated"; they are rehashed on next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Worker processes doing bcrypt, and how many requests may wait for one.
+# PASSWORD_HASH_WORKERS=0 hashes in the threadpool instead (tests, tiny instances).
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(os.cpu_count() or 1, 4))))
+HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", str(max(HASH_WORKERS, 1) * 8)))
+
+# bcrypt only looks at the first 72 bytes of the password
+BCRYPT_MAX_BYTES = 72
+
+# Password hashing context (rebuilt identically inside each worker process)
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+HASH_QUEUE_WAIT = Histogram(
+    "password_hash_queue_wait_seconds", "Time spent waiting for a free bcrypt worker"
+)
+HASH_DURATION = Histogram(
+    "password_hash_duration_seconds", "bcrypt hash/verify time including dispatch", ["op"]
+)
+HASH_IN_FLIGHT = Gauge("password_hash_in_flight", "bcrypt operations running or queued")
+HASH_REJECTED = Counter(
+    "password_hash_rejected_total", "bcrypt operations refused because the queue was full"
+)
+
+
+def _truncate(password: str) -> str:
+    raw = password.encode("utf-8")
+    if len(raw) <= BCRYPT_MAX_BYTES:
+        return password
+    return raw[:BCRYPT_MAX_BYTES].decode("utf-8", errors="ignore")
+
+
+# -------------------------------
+# Functions executed in the worker processes
+# -------------------------------
+def hash_password(password: str) -> str:
+    return pwd_context.hash(_truncate(password))
+
+
+def verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(matches, new_hash) -- new_hash is set when the stored hash uses an outdated cost."""
+    return pwd_context.verify_and_update(_truncate(password), hashed_password)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt outside the request threadpool with bounded concurrency.
+    At most `workers` operations run at once and at most `queue_limit` wait;
+    anything beyond that is refused with 503 so a login burst cannot stall
+    unrelated endpoints.
+    """
+
+    def __init__(self, workers: int = HASH_WORKERS, queue_limit: int = HASH_QUEUE_LIMIT):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.waiting = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def _run(self, op: str, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(max(self.workers, 1))
+        if self._slots.locked() and self.waiting >= self.queue_limit:
+            HASH_REJECTED.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many sign-in requests, please retry shortly.",
+                headers={"Retry-After": "1"},
+            )
+
+        HASH_IN_FLIGHT.inc()
+        queued_at = time.monotonic()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            HASH_IN_FLIGHT.dec()
+            raise
+        finally:
+            self.waiting -= 1
+        started_at = time.monotonic()
+        HASH_QUEUE_WAIT.observe(started_at - queued_at)
+        try:
+            if self.workers > 0:
+                return await asyncio.get_running_loop().run_in_executor(self._pool(), fn, *args)
+            return await run_in_threadpool(fn, *args)
+        finally:
+            self._slots.release()
+            HASH_IN_FLIGHT.dec()
+            HASH_DURATION.observe(time.monotonic() - started_at, (op,))
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", hash_password, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self._run("verify", verify_and_update, password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queue_limit": self.queue_limit,
+            "waiting": self.waiting,
+            "in_flight": HASH_IN_FLIGHT.values.get((), 0.0),
+            "rejected": HASH_REJECTED.values.get((), 0.0),
+            "queue_wait_seconds": HASH_QUEUE_WAIT.summary(),
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,173 @@
+import os
+import re
+import unicodedata
+from typing import List, Optional
+
+from sqlalchemy import column, func, literal_column, null, table, union_all
+from sqlmodel import select
+
+from models.models import Project, Task, TaskArchive, Team, TeamMemberLink
+
+# Longer queries are cut; each term is matched as a word prefix
+MAX_TERMS = 8
+MAX_TERM_CHARS = 64
+
+# Only the newest N matches are ranked. Ranking must touch every candidate, so
+# without a cap a word found in most tasks would cost a full index walk per
+# search; queries with fewer matches than this are ranked exactly.
+SEARCH_CANDIDATES = int(os.getenv("SEARCH_CANDIDATES", "1000"))
+
+_TERM = re.compile(r"\w+")
+
+# SQLite bm25 column weights (title/name, description)
+_BM25_WEIGHTS = (10.0, 1.0)
+
+
+def _fold(text: str) -> str:
+    # same folding as the index: lower case, accents removed
+    return "".join(c for c in unicodedata.normalize("NFKD", text.lower()) if not unicodedata.combining(c))
+
+
+def terms(q: str) -> List[str]:
+    """Words of the user's query; everything else (quotes, operators) is dropped."""
+    return [t[:MAX_TERM_CHARS] for t in _TERM.findall(_fold(q))][:MAX_TERMS]
+
+
+def snippet(text: Optional[str], words: List[str], width: int = 12) -> Optional[str]:
+    """Up to `width` words of `text` around the first hit, hits wrapped in [ ]."""
+    if not text:
+        return None
+    tokens = text.split()
+    hits = [any(_fold(t).lstrip("([{\"'").startswith(w) for w in words) for t in tokens]
+    if not any(hits):
+        return None
+    start = max(0, min(hits.index(True) - 2, len(tokens) - width))
+    shown = [f"[{t}]" if hit else t for t, hit in zip(tokens[start:start + width], hits[start:start + width])]
+    return ("… " if start else "") + " ".join(shown) + (" …" if start + width < len(tokens) else "")
+
+
+# -------------------------------
+# Per-entity base queries: id, title, body, team_id, project_id, assigned_to + filters
+# -------------------------------
+def _task_base(team_id: Optional[int], project_id: Optional[int], user_id: Optional[int], model=Task):
+    query = select(
+        model.id,
+        model.title.label("title"),
+        model.description.label("body"),
+        Project.team_id,
+        model.project_id,
+        model.assigned_to,
+    ).join(Project, model.project_id == Project.id)
+    if team_id is not None:
+        query = query.where(Project.team_id == team_id)
+    if project_id is not None:
+        query = query.where(model.project_id == project_id)
+    if user_id is not None:
+        query = query.where(model.assigned_to == user_id)
+    return query
+
+
+def _archived_task_base(team_id: Optional[int], project_id: Optional[int], user_id: Optional[int]):
+    return _task_base(team_id, project_id, user_id, model=TaskArchive)
+
+
+def _project_base(team_id: Optional[int], project_id: Optional[int], user_id: Optional[int]):
+    query = select(
+        Project.id,
+        Project.name.label("title"),
+        Project.description.label("body"),
+        Project.team_id,
+        Project.id.label("project_id"),
+        null().label("assigned_to"),
+    )
+    if team_id is not None:
+        query = query.where(Project.team_id == team_id)
+    if project_id is not None:
+        query = query.where(Project.id == project_id)
+    if user_id is not None:
+        query = query.where(Project.team_id.in_(
+            select(TeamMemberLink.team_id).where(TeamMemberLink.user_id == user_id)
+        ))
+    return query
+
+
+def _team_base(team_id: Optional[int], project_id: Optional[int], user_id: Optional[int]):
+    query = select(
+        Team.id,
+        Team.name.label("title"),
+        Team.description.label("body"),
+        Team.id.label("team_id"),
+        null().label("project_id"),
+        null().label("assigned_to"),
+    )
+    if team_id is not None:
+        query = query.where(Team.id == team_id)
+    if project_id is not None:
+        query = query.where(Team.id.in_(select(Project.team_id).where(Project.id == project_id)))
+    if user_id is not None:
+        query = query.where(Team.id.in_(
+            select(TeamMemberLink.team_id).where(TeamMemberLink.user_id == user_id)
+        ))
+    return query
+
+
+ENTITIES = {
+    "task": (Task, _task_base),
+    "project": (Project, _project_base),
+    "team": (Team, _team_base),
+}
+
+
+# -------------------------------
+# Ranked full-text query (FTS5 on SQLite, tsvector/GIN on Postgres)
+# -------------------------------
+def _candidates(dialect: str, model, query, words: List[str]):
+    # the newest SEARCH_CANDIDATES matches of one table, with their score
+    name = model.__tablename__
+    if dialect == "postgresql":
+        tsquery = func.to_tsquery("simple", " & ".join(f"{w}:*" for w in words))
+        vector = literal_column(f"{name}.search")
+        return (
+            query.add_columns(func.ts_rank(vector, tsquery).label("score"))
+            .where(vector.op("@@")(tsquery))
+            .order_by(model.id.desc())
+            .limit(SEARCH_CANDIDATES)
+            .subquery()
+        )
+
+    fts = table(f"{name}_fts", column("rowid"))
+    fts_column = literal_column(f"{name}_fts")
+    return (
+        # bm25 is lower-is-better; FTS5 yields rowid-descending matches without a sort
+        query.add_columns((-func.bm25(fts_column, *_BM25_WEIGHTS)).label("score"))
+        .join(fts, fts.c.rowid == model.id)
+        .where(fts_column.op("MATCH")(" ".join(f'"{w}"*' for w in words)))
+        .order_by(fts.c.rowid.desc())
+        .limit(SEARCH_CANDIDATES)
+        .subquery()
+    )
+
+
+def search_query(
+    dialect: str,
+    entity: str,
+    words: List[str],
+    limit: int,
+    team_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    include_archived: bool = False,
+):
+    """
+    Best `limit` matches of `entity` containing every word (as a prefix), best
+    first, with a `score` column (higher is better). Candidates are the newest
+    SEARCH_CANDIDATES matches inside the filters. With `include_archived`,
+    tasks are looked up in the archive as well (each table ranked on its own
+    statistics, so scores across the two are comparable only roughly).
+    """
+    model, base = ENTITIES[entity]
+    candidates = _candidates(dialect, model, base(team_id, project_id, user_id), words)
+    if include_archived and entity == "task":
+        archived = _candidates(dialect, TaskArchive, _archived_task_base(team_id, project_id, user_id), words)
+        candidates = union_all(select(*candidates.c), select(*archived.c)).subquery()
+    return select(*candidates.c).order_by(candidates.c.score.desc()).limit(limit)
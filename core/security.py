@@ -0,0 +1,186 @@
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from pydantic import BaseModel
+
+logger = logging.getLogger("app.security")
+
+# Tokens are HMAC-SHA256 signed; every worker must share the same key. Without
+# AUTH_SECRET_KEY each process signs with a random key of its own: fine for a
+# single local process, but tokens then survive neither restarts nor a hop to
+# another worker.
+SECRET_KEY = os.getenv("AUTH_SECRET_KEY", "")
+if not SECRET_KEY:
+    SECRET_KEY = secrets.token_urlsafe(32)
+    logger.warning("AUTH_SECRET_KEY is not set: tokens are signed with a random per-process key")
+ACCESS_TOKEN_TTL = int(os.getenv("ACCESS_TOKEN_TTL_SECONDS", "900"))
+REFRESH_TOKEN_TTL = int(os.getenv("REFRESH_TOKEN_TTL_SECONDS", str(7 * 24 * 3600)))
+TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+
+
+class TokenClaims(BaseModel):
+    sub: int                 # user id
+    adm: bool = False        # is_admin
+    teams: List[int] = []    # team ids at issue time
+    typ: str = "access"      # access / refresh
+    jti: str
+    iat: int
+    exp: int
+
+    @property
+    def user_id(self) -> int:
+        return self.sub
+
+
+# -------------------------------
+# Encoding / signing
+# -------------------------------
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: str) -> str:
+    digest = hmac.new(SECRET_KEY.encode(), payload.encode(), hashlib.sha256).digest()
+    return _b64encode(digest)
+
+
+def create_token(user_id: int, is_admin: bool, team_ids: List[int], typ: str, ttl: int) -> str:
+    now = int(time.time())
+    claims = {
+        "sub": user_id,
+        "adm": is_admin,
+        "teams": sorted(team_ids),
+        "typ": typ,
+        "jti": uuid.uuid4().hex,
+        "iat": now,
+        "exp": now + ttl,
+    }
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+    return f"{payload}.{_sign(payload)}"
+
+
+def issue_tokens(user_id: int, is_admin: bool, team_ids: List[int]) -> Dict[str, object]:
+    return {
+        "access_token": create_token(user_id, is_admin, team_ids, "access", ACCESS_TOKEN_TTL),
+        "refresh_token": create_token(user_id, is_admin, team_ids, "refresh", REFRESH_TOKEN_TTL),
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_TTL,
+    }
+
+
+def _invalid(detail: str = "Invalid or expired token") -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _decode(token: str) -> TokenClaims:
+    try:
+        payload, signature = token.split(".")
+    except ValueError:
+        raise _invalid()
+    if not hmac.compare_digest(signature, _sign(payload)):
+        raise _invalid()
+    try:
+        return TokenClaims(**json.loads(_b64decode(payload)))
+    except ValueError:
+        raise _invalid()
+
+
+# -------------------------------
+# Revocation list (in memory, pruned as entries expire)
+# -------------------------------
+class RevocationList:
+    def __init__(self):
+        self._revoked: Dict[str, int] = {}   # jti -> exp
+        self._lock = threading.Lock()
+
+    def revoke(self, claims: TokenClaims) -> None:
+        now = time.time()
+        with self._lock:
+            self._revoked[claims.jti] = claims.exp
+            for jti in [j for j, exp in self._revoked.items() if exp < now]:
+                del self._revoked[jti]
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._revoked
+
+
+# -------------------------------
+# Verified-token cache
+# -------------------------------
+class TokenVerifier:
+    """
+    Verifies tokens and keeps the decoded claims in a bounded LRU, so a token
+    that was seen before costs one dict lookup: no HMAC, no JSON, no database.
+    Expiry and revocation are still checked on every call.
+    """
+
+    def __init__(self, maxsize: int = TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.revoked = RevocationList()
+        self._cache: "OrderedDict[str, TokenClaims]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def verify(self, token: str, typ: str = "access") -> TokenClaims:
+        with self._lock:
+            claims = self._cache.get(token)
+            if claims is not None:
+                self._cache.move_to_end(token)
+        if claims is None:
+            claims = _decode(token)
+            with self._lock:
+                self._cache[token] = claims
+                while len(self._cache) > self.maxsize:
+                    self._cache.popitem(last=False)
+
+        if claims.typ != typ or claims.exp < time.time():
+            raise _invalid()
+        if self.revoked.is_revoked(claims.jti):
+            raise _invalid("Token has been revoked")
+        return claims
+
+    def revoke(self, claims: TokenClaims) -> None:
+        self.revoked.revoke(claims)
+
+
+token_verifier = TokenVerifier()
+
+
+# -------------------------------
+# FastAPI dependencies
+# -------------------------------
+_bearer = HTTPBearer(auto_error=False)
+
+
+async def get_optional_claims(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer),
+) -> Optional[TokenClaims]:
+    """Claims of the bearer token if one was sent; routes fall back to their legacy params otherwise."""
+    if credentials is None:
+        return None
+    return token_verifier.verify(credentials.credentials)
+
+
+async def get_current_claims(claims: Optional[TokenClaims] = Depends(get_optional_claims)) -> TokenClaims:
+    if claims is None:
+        raise _invalid("Not authenticated")
+    return claims
@@ -0,0 +1,91 @@
+import hashlib
+import time
+from email.utils import formatdate
+from typing import Iterable, Mapping, Optional, Set
+
+from fastapi import Request, Response
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select
+
+from core.database import DbSession
+from models.models import ChangeVersion
+
+# -------------------------------
+# Change-version scopes
+# -------------------------------
+# A scope is a table ("task") or a slice of one ("task:team:3"). Write routes
+# bump every scope their rows fall into, in their own transaction; read routes
+# derive their ETag from the scopes that cover their result. The counters live
+# in the database so every worker sees the same value.
+
+
+def task_scopes(team_id: int, tasks: Iterable) -> Set[str]:
+    """Scopes touched by writing `tasks` (need project_id and assigned_to) of team `team_id`."""
+    scopes = {"task", f"task:team:{team_id}"}
+    for t in tasks:
+        scopes.add(f"task:project:{t.project_id}")
+        scopes.add(f"task:user:{t.assigned_to}")
+    return scopes
+
+
+def project_scopes(team_id: int) -> Set[str]:
+    return {"project", f"project:team:{team_id}"}
+
+
+def bump(session: Session, scopes: Iterable[str]) -> None:
+    """Upsert `version = version + 1` for every scope, in the caller's transaction."""
+    now = time.time()
+    params = [{"scope": s, "version": 1, "updated_at": now} for s in sorted(set(scopes))]
+    if not params:
+        return
+    dialect = session.get_bind().dialect.name
+    stmt = (pg_insert if dialect == "postgresql" else sqlite_insert)(ChangeVersion)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["scope"],
+        set_={"version": ChangeVersion.version + 1, "updated_at": stmt.excluded["updated_at"]},
+    )
+    session.exec(stmt, params=params)
+
+
+# -------------------------------
+# Conditional GET
+# -------------------------------
+def _matches(if_none_match: str, etag: str) -> bool:
+    # weak comparison: W/"x" and "x" name the same representation
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+async def not_modified(
+    request: Request, response: Response, session: DbSession, *scopes: str
+) -> Optional[Response]:
+    """
+    Look up the versions of `scopes` (one primary-key query) and set `ETag` /
+    `Last-Modified` on `response`. Returns a ready 304 when the client's
+    `If-None-Match` still matches, so the route can skip its main query.
+    """
+    rows = (await session.exec(
+        select(ChangeVersion.scope, ChangeVersion.version, ChangeVersion.updated_at)
+        .where(ChangeVersion.scope.in_(scopes))
+    )).all()
+    found = {r.scope: r for r in rows}
+    state = ";".join(f"{s}={found[s].version if s in found else 0}" for s in sorted(scopes))
+    # the query string is part of the tag: pages and filters are different representations
+    digest = hashlib.blake2b(f"{request.url.path}?{request.url.query}|{state}".encode(), digest_size=12)
+    headers = {"ETag": f'W/"{digest.hexdigest()}"'}
+    if rows:
+        headers["Last-Modified"] = formatdate(max(r.updated_at for r in rows), usegmt=True)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return None
+
+
+def validators(response: Response) -> Mapping[str, str]:
+    """The ETag / Last-Modified set by `not_modified`, for responses built by hand (streams)."""
+    return {k: v for k, v in response.headers.items() if k in ("etag", "last-modified")}
@@ -2,22 +2,91 @@ import os
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-from core.database import create_db_and_tables
+from core.admission import AdmissionMiddleware, RouteClass, TokenBuckets
+from core.compression import CompressionMiddleware
+from core.database import DB_MODE, DB_PROFILE, async_engine, engine, pool_status
+from core.instrumentation import InstrumentationMiddleware
+from core.metrics import CONTENT_TYPE, Gauge, render
+from core.migrations import migrate
+from core.passwords import password_hasher
 from routes.auth import router as auth_router
 from routes.team import router as team_router  
 from routes.project import router as project_router
+from routes.imports import router as imports_router
+from routes.dashboard import router as dashboard_router
+from routes.events import router as events_router
+from routes.search import router as search_router
+from routes.jobs import router as jobs_router
+from routes.exports import router as exports_router
+from routes.sync import router as sync_router
+from routes.workspace import router as workspace_router
+from routes.batch import router as batch_router
 
 app = FastAPI(title="Team Collaboration App Backend")
 
 # -------------------------------
-# Create tables on startup
+# Apply pending schema migrations on startup
 # -------------------------------
 @app.on_event("startup")
 def on_startup():
-    create_db_and_tables()
+    migrate(engine)
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    password_hasher.shutdown()
+    if async_engine is not None:
+        await async_engine.dispose()
+
+# -------------------------------
+# Admission control: per route class concurrency caps with short bounded
+# queues, so cheap calls never wait behind bcrypt or large list queries
+# (innermost, so refusals still carry CORS headers)
+# -------------------------------
+ROUTE_CLASSES = {
+    "critical": RouteClass(concurrency=32, queue=64, timeout=1.0, rate_limited=False),
+    "auth": RouteClass(concurrency=4, queue=32, timeout=5.0),        # bcrypt-bound
+    "heavy": RouteClass(concurrency=8, queue=16, timeout=2.0),       # large reads
+    # streamed uploads / downloads hold their slot for the whole transfer,
+    # so they get their own and never crowd out the heavy reads
+    "transfer": RouteClass(concurrency=4, queue=8, timeout=2.0),
+    "default": RouteClass(concurrency=64, queue=128, timeout=2.0),
+}
+ROUTE_CLASS_OF = {
+    "/health": "critical",
+    "/metrics": "critical",
+    "/login": "auth",
+    "/signup": "auth",
+    "/admin/tasks": "heavy",
+    "/teams_list": "heavy",
+    "/users_list": "heavy",
+    "/users/{user_id}/workspace": "heavy",
+    "/export/tasks": "transfer",
+    "/import_tasks/{project_id}": "transfer",
+    "/search": "heavy",
+    "/batch": "heavy",
+}
+# token bucket per user (bearer token) or client address; 0 turns it off
+RATE_LIMIT_RPS = float(os.getenv("RATE_LIMIT_RPS", "20"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "40"))
+# Reverse proxies in front of the app (1 on Render). The client address is
+# then the X-Forwarded-For entry the outermost proxy appended, counted from the
+# right; the leftmost entries come from the client. Do not run uvicorn with
+# --forwarded-allow-ips '*' for this: it trusts the leftmost entry instead.
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+
+if os.getenv("ADMISSION_CONTROL", "on").lower() not in ("0", "off", "false", "no"):
+    app.add_middleware(
+        AdmissionMiddleware,
+        classes=ROUTE_CLASSES,
+        routes=ROUTE_CLASS_OF,
+        rate_limit=TokenBuckets(RATE_LIMIT_RPS, RATE_LIMIT_BURST) if RATE_LIMIT_RPS > 0 else None,
+        exempt=["/events"],  # long-lived streams would hold a slot for good
+        proxy_hops=TRUSTED_PROXY_HOPS,
+    )
 
 # -------------------------------
 # CORS (Allow frontend to connect)
@@ -35,6 +104,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# -------------------------------
+# Response compression (gzip, or brotli when installed) above a size threshold
+# -------------------------------
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESS_MIN_BYTES", "1024")),
+)
+
+# -------------------------------
+# Per-route latency and SQL counts (outermost, so it times everything above)
+# -------------------------------
+app.add_middleware(InstrumentationMiddleware)
+
 # -------------------------------
 # Routes
 # -------------------------------
@@ -42,10 +124,39 @@ app.add_middleware(
 app.include_router(auth_router)
 app.include_router(team_router)
 app.include_router(project_router)
+app.include_router(imports_router)
+app.include_router(dashboard_router)
+app.include_router(events_router)
+app.include_router(search_router)
+app.include_router(jobs_router)
+app.include_router(exports_router)
+app.include_router(sync_router)
+app.include_router(workspace_router)
+app.include_router(batch_router)
 
 # -------------------------------
 # Health Check
 # -------------------------------
 @app.get("/health")
-def health_check():
-    return {"status": "ok", "message": "Backend is running"}
+async def health_check():
+    return {
+        "status": "ok",
+        "message": "Backend is running",
+        "db": {"mode": DB_MODE, "profile": DB_PROFILE, "pools": pool_status()},
+        "password_hashing": password_hasher.stats(),
+    }
+
+
+# -------------------------------
+# Prometheus metrics
+# -------------------------------
+POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections currently checked out", ["engine"])
+POOL_CHECKOUTS = Gauge("db_pool_checkouts", "Connections checked out since start", ["engine"])
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    for name, pool in pool_status().items():
+        POOL_CHECKED_OUT.set(pool["checked_out"], labels=(name,))
+        POOL_CHECKOUTS.set(pool["total_checkouts"], labels=(name,))
+    return Response(render(), media_type=CONTENT_TYPE)
@@ -1,12 +1,21 @@
+from datetime import datetime, timezone
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index, text
 from typing import Optional, List
 
+
+def utcnow() -> datetime:
+    # stored naive, always UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 # -------------------------------
 # Association table (Many-to-Many)
 # -------------------------------
 class TeamMemberLink(SQLModel, table=True):
     team_id: Optional[int] = Field(default=None, foreign_key="team.id", primary_key=True)
-    user_id: Optional[int] = Field(default=None, foreign_key="user.id", primary_key=True)
+    # the primary key already covers team_id lookups; user_id needs its own index
+    user_id: Optional[int] = Field(default=None, foreign_key="user.id", primary_key=True, index=True)
 
 # -------------------------------
 # User Model
@@ -33,6 +42,7 @@ class Team(SQLModel, table=True):
 
     # Many-to-many relationship with User
     members: List[User] = Relationship(back_populates="teams", link_model=TeamMemberLink)
+    projects: List["Project"] = Relationship(back_populates="team")
 
 # -------------------------------
 # Project Model
@@ -41,16 +51,114 @@ class Project(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(index=True)
     description: Optional[str] = None
-    team_id: int = Field(foreign_key="team.id")
+    team_id: int = Field(foreign_key="team.id", index=True)
     created_by: int = Field(foreign_key="user.id")   # admin
 
+    team: Optional[Team] = Relationship(back_populates="projects")
+    tasks: List["Task"] = Relationship(back_populates="project")
+
 # -------------------------------
 # Task Model
 # -------------------------------
 class Task(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_task_assigned_to_status", "assigned_to", "status"),
+        Index("ix_task_project_id_status", "project_id", "status"),
+        # keyset pages (filter, then ORDER BY id LIMIT n) read these in order and stop
+        Index("ix_task_assigned_to_id", "assigned_to", "id"),
+        Index("ix_task_project_id_id", "project_id", "id"),
+        # archival picks completed tasks by age
+        Index("ix_task_status_completed_at", "status", "completed_at"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str
     description: Optional[str] = None
     status: str = Field(default="To-Do")          # To-Do / In Progress / Completed
     project_id: int = Field(foreign_key="project.id")
-    assigned_to: int = Field(foreign_key="user.id")  # member
\ No newline at end of file
+    assigned_to: int = Field(foreign_key="user.id")  # member
+    # bumped on every status change; writers send the version they read (optimistic concurrency)
+    version: int = Field(default=1, sa_column_kwargs={"server_default": text("1")})
+    # set on insert, also by the bulk INSERTs (NULL for tasks older than the column)
+    created_at: Optional[datetime] = Field(default=None, sa_column_kwargs={"default": utcnow})
+    # set when the status becomes Completed, cleared when it leaves it
+    completed_at: Optional[datetime] = None
+
+    project: Optional[Project] = Relationship(back_populates="tasks")
+
+# -------------------------------
+# Archived tasks (completed long ago; moved out of `task` by core/archive.py)
+# -------------------------------
+class TaskArchive(SQLModel, table=True):
+    # same columns as Task, so both can be read as one (see archive.task_source)
+    __table_args__ = (
+        Index("ix_taskarchive_assigned_to_id", "assigned_to", "id"),
+        Index("ix_taskarchive_project_id_id", "project_id", "id"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": False})
+    title: str
+    description: Optional[str] = None
+    status: str
+    project_id: int = Field(foreign_key="project.id")
+    assigned_to: int = Field(foreign_key="user.id")
+    version: int = Field(default=1)
+    created_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    archived_at: Optional[datetime] = None
+
+# -------------------------------
+# Task status counters (dashboard summaries)
+# -------------------------------
+class TaskStatusCounter(SQLModel, table=True):
+    # one row per (team, project, assignee, status); maintained by the task write routes
+    team_id: int = Field(primary_key=True)
+    project_id: int = Field(primary_key=True)
+    assigned_to: int = Field(primary_key=True)
+    status: str = Field(primary_key=True)
+    count: int = Field(default=0)
+
+# -------------------------------
+# Change versions (ETag / If-None-Match on the list endpoints)
+# -------------------------------
+class ChangeVersion(SQLModel, table=True):
+    # one row per scope ("task", "task:team:3", "project:team:3", ...); bumped by the write routes
+    scope: str = Field(primary_key=True, max_length=64)
+    version: int = Field(default=0)
+    updated_at: float = Field(default=0)  # unix time of the last bump
+
+# -------------------------------
+# Background jobs (claimed by worker.py)
+# -------------------------------
+class Job(SQLModel, table=True):
+    __table_args__ = (
+        # the worker's claim query: runnable jobs in due order
+        Index("ix_job_status_available_at", "status", "available_at"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str = Field(max_length=64)              # handler name, e.g. "bulk_tasks"
+    payload: str                                  # JSON arguments for the handler
+    status: str = Field(default="queued", max_length=16)  # queued / running / succeeded / failed
+    attempts: int = Field(default=0)
+    max_attempts: int = Field(default=3)
+    # queued: not before this time; running: the claim expires (visibility timeout)
+    available_at: float = Field(default=0)
+    locked_by: Optional[str] = Field(default=None, max_length=64)
+    result: Optional[str] = None                  # JSON returned by the handler
+    error: Optional[str] = None                   # last failure
+    created_at: float = Field(default=0)
+    updated_at: float = Field(default=0)
+
+# -------------------------------
+# Change log (GET /sync)
+# -------------------------------
+class ChangeLog(SQLModel, table=True):
+    # AUTOINCREMENT: SQLite must never hand out a seq again once the log is compacted
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq: Optional[int] = Field(default=None, primary_key=True)
+    entity: str = Field(max_length=16)        # task / project / team / user
+    entity_id: int
+    op: str = Field(max_length=8)             # create / update / delete
+    created_at: float = Field(default=0)      # unix time, used for compaction
@@ -1,38 +1,26 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from sqlmodel import Session, select
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, status
+from sqlmodel import select
+from typing import Optional
 from models.models import User
-from schemas.user_schema import UserCreate, UserRead, UserLogin
-from core.database import get_session
-from passlib.context import CryptContext
+from schemas.user_schema import UserCreate, UserRead, UserLogin, LoginRead, TokenRefresh, TokenPair
+from core import changes, versions
+from core.database import DbSession, get_async_session
+from core.membership import memberships
+from core.pagination import PageParams, apply_keyset, trim_page, stream_json_array
+from core.passwords import password_hasher
+from core.security import TokenClaims, get_current_claims, issue_tokens, token_verifier
+from core.serialization import RowSerializer
 
 #  Simple router, no prefix
 router = APIRouter(tags=["Authentication"])
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def hash_password(password: str) -> str:
-    # bcrypt 72 char max support karta hai
-    if len(password) > 72:
-        password = password[:72]
-    return pwd_context.hash(password)
-
-# -------------------------------
-# Helper functions
-# -------------------------------
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
-
 # -------------------------------
 # Signup Route
 # -------------------------------
 @router.post("/signup", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-def signup(user: UserCreate, session: Session = Depends(get_session)):
+async def signup(user: UserCreate, session: DbSession = Depends(get_async_session)):
     # Check if email already exists
-    existing_user = session.exec(select(User).where(User.email == user.email)).first()
+    existing_user = (await session.exec(select(User).where(User.email == user.email))).first()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -43,38 +31,97 @@ def signup(user: UserCreate, session: Session = Depends(get_session)):
     new_user = User(
         name=user.name,
         email=user.email,
-        password=hash_password(user.password),
+        password=await password_hasher.hash(user.password),
         is_admin=user.is_admin
     )
     session.add(new_user)
-    session.commit()
-    session.refresh(new_user)
+    await session.flush()
+    await session.run_sync(versions.bump, ["user"])
+    await session.run_sync(changes.record, "user", [new_user.id], "create")
+    await session.commit()
+    await session.refresh(new_user)
     return new_user
 
 # -------------------------------
 # Login Route
 # -------------------------------
-@router.post("/login", response_model=UserRead)
-def login(user: UserLogin, session: Session = Depends(get_session)):
-    db_user = session.exec(select(User).where(User.email == user.email)).first()
+async def _team_ids(session: DbSession, user_id: int) -> list[int]:
+    return sorted(await memberships.user_teams(session, user_id))
+
+
+@router.post("/login", response_model=LoginRead)
+async def login(user: UserLogin, session: DbSession = Depends(get_async_session)):
+    db_user = (await session.exec(select(User).where(User.email == user.email))).first()
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No account found with this email."
         )
 
-    if not verify_password(user.password, db_user.password):
+    valid, new_hash = await password_hasher.verify_and_update(user.password, db_user.password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="The password you entered is incorrect."
         )
 
-    return db_user
+    # bcrypt cost changed since this hash was made -> store an upgraded one
+    if new_hash:
+        db_user.password = new_hash
+        session.add(db_user)
+        await session.commit()
+
+    tokens = issue_tokens(db_user.id, db_user.is_admin, await _team_ids(session, db_user.id))
+    return LoginRead(**UserRead.model_validate(db_user).model_dump(), **tokens)
+
+# -------------------------------
+# Token refresh / logout
+# -------------------------------
+@router.post("/token/refresh", response_model=TokenPair)
+async def refresh_token(data: TokenRefresh, session: DbSession = Depends(get_async_session)):
+    claims = token_verifier.verify(data.refresh_token, typ="refresh")
+    db_user = await session.get(User, claims.user_id)
+    if not db_user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User no longer exists.")
+
+    # refresh tokens are single use; team ids are re-read so membership changes show up
+    token_verifier.revoke(claims)
+    return issue_tokens(db_user.id, db_user.is_admin, await _team_ids(session, db_user.id))
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    data: Optional[TokenRefresh] = None,
+    claims: TokenClaims = Depends(get_current_claims),
+):
+    token_verifier.revoke(claims)
+    if data is not None:
+        token_verifier.revoke(token_verifier.verify(data.refresh_token, typ="refresh"))
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 # -------------------------------
 # user-list Route
 # -------------------------------
+# password hashes never leave the database: only the UserRead columns are selected
+users_query = select(User.id, User.name, User.email, User.is_admin, User.role)
+user_rows = RowSerializer(UserRead, users_query)
+
 
 @router.get("/users_list", response_model=list[UserRead])
-def users_list(session: Session = Depends(get_session)):
-    return session.exec(select(User)).all()
+async def users_list(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    session: DbSession = Depends(get_async_session)
+):
+    unchanged = await versions.not_modified(request, response, session, "user")
+    if unchanged:
+        return unchanged
+
+    query = apply_keyset(users_query, User.id, page)
+    if page.stream:
+        return await stream_json_array(
+            session, query, User.id, page, lambda _, u: user_rows.dumps_row(u),
+            headers=versions.validators(response),
+        )
+    return user_rows.response(trim_page((await session.exec(query)).all(), page, response), response)
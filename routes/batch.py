@@ -0,0 +1,209 @@
+import asyncio
+import base64
+import logging
+import os
+from typing import Dict, List, Tuple
+from urllib.parse import urlencode, urlsplit
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import text
+
+from core.database import DbSession, get_async_session, shared_session
+from schemas.batch_schema import BatchItem, BatchRequest, BatchResponse
+
+router = APIRouter(tags=["Batch"])
+logger = logging.getLogger("app.batch")
+
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+# Sub-requests not started by then are answered 504; running ones always finish
+BATCH_TIMEOUT = float(os.getenv("BATCH_TIMEOUT_SECONDS", "10"))
+# Sum of the sub-response bodies; the one that crosses it is answered 413
+BATCH_MAX_RESPONSE_BYTES = int(os.getenv("BATCH_MAX_RESPONSE_BYTES", str(4 * 1024 * 1024)))
+
+# never dispatched: recursion, endless event streams, file downloads
+_EXCLUDED_PREFIXES = ("/batch", "/events", "/export")
+# taken from the batch request unless the sub-request sets its own
+_FORWARDED_HEADERS = (b"authorization", b"cookie", b"user-agent")
+# never passed on from a sub-request: sub-responses are spliced into the batch
+# body uncompressed, and hop-by-hop headers concern the batch connection only
+_DROPPED_HEADERS = {
+    b"accept-encoding", b"connection", b"keep-alive", b"proxy-authorization", b"proxy-connection",
+    b"te", b"trailer", b"transfer-encoding", b"upgrade", b"content-length", b"host",
+}
+
+Result = Tuple[int, Dict[str, str], bytes]
+
+
+def _error(status: int, detail: str) -> Result:
+    return status, {"content-type": "application/json"}, orjson.dumps({"detail": detail})
+
+
+class _Budget:
+    """Response bytes left for the whole batch."""
+
+    def __init__(self, limit: int):
+        self.left = limit
+        self.exceeded = False
+
+    def take(self, size: int) -> None:
+        self.left -= size
+        if self.left < 0:
+            self.exceeded = True
+            raise RuntimeError("batch response limit exceeded")
+
+
+# -------------------------------
+# One sub-request through the ASGI app
+# -------------------------------
+async def _dispatch(request: Request, item: BatchItem, budget: _Budget) -> Result:
+    url = urlsplit(item.path)
+    query = "&".join(q for q in (url.query, urlencode(item.params, doseq=True)) if q)
+    own = {k.lower().encode("latin-1"): v.encode("latin-1") for k, v in item.headers.items()}
+    own = {k: v for k, v in own.items() if k not in _DROPPED_HEADERS}
+    headers = [(k, v) for k, v in request.scope["headers"] if k in _FORWARDED_HEADERS and k not in own]
+    scope = {
+        **{k: v for k, v in request.scope.items() if k in ("asgi", "http_version", "scheme", "server", "client")},
+        "type": "http",
+        "method": "GET",
+        "path": url.path,
+        "raw_path": url.path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": headers + list(own.items()),
+        "batch": True,  # admitted with the batch (see core/admission.py)
+    }
+
+    finished = asyncio.Event()
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    status, response_headers, body = 500, {}, bytearray()
+
+    async def send(message):
+        nonlocal status, response_headers
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers = {
+                k.decode("latin-1"): v.decode("latin-1")
+                for k, v in message.get("headers", []) if k != b"content-length"
+            }
+        elif message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            budget.take(len(chunk))
+            body.extend(chunk)
+
+    try:
+        await request.app(scope, receive, send)
+    except Exception:
+        if budget.exceeded:
+            return _error(413, "batch response size limit reached")
+        logger.exception("batch sub-request GET %s failed", item.path)
+        return _error(500, "Internal Server Error")
+    finally:
+        finished.set()
+    return status, response_headers, bytes(body)
+
+
+def _item_json(item: BatchItem, result: Result) -> bytes:
+    status, headers, body = result
+    content_type = headers.get("content-type", "")
+    encoding = headers.get("content-encoding", "identity").lower()
+    if not body:
+        body_json = b"null"
+    elif encoding != "identity":
+        # not expected (Accept-Encoding is never passed on), but never spliced as text
+        body_json = orjson.dumps(base64.b64encode(body).decode())
+    elif "json" in content_type:
+        body_json = body   # already JSON: spliced in, not parsed and re-encoded
+    else:
+        body_json = orjson.dumps(body.decode(errors="replace"))
+    return b"".join((
+        b'{"id":', orjson.dumps(item.id),
+        b',"status":', str(status).encode(),
+        b',"headers":', orjson.dumps(headers),
+        b',"body":', body_json, b"}",
+    ))
+
+
+async def _begin_snapshot(session: DbSession) -> None:
+    # one transaction that sees a single state of the database for all reads
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        await session.exec(text("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ"))
+    elif dialect == "sqlite":
+        # the sqlite driver only opens transactions for writes
+        await session.exec(text("BEGIN"))
+
+
+# -------------------------------
+# Many GETs in one round trip
+# -------------------------------
+@router.post("/batch", response_model=BatchResponse)
+async def batch(
+    data: BatchRequest,
+    request: Request,
+    session: DbSession = Depends(get_async_session),
+):
+    """
+    Runs up to BATCH_MAX_REQUESTS GET sub-requests against this app and
+    returns every status, headers and body in one response, in request order.
+
+    With `concurrency=1` (the default) they run one after another on this
+    request's session inside one transaction, so all of them read the same
+    snapshot. A higher `concurrency` (capped at BATCH_MAX_CONCURRENCY) runs
+    that many at once, each on its own session. Sub-requests with
+    `stream=true` always read through their own session.
+    """
+    if len(data.requests) > BATCH_MAX_REQUESTS:
+        raise HTTPException(400, f"A batch holds at most {BATCH_MAX_REQUESTS} sub-requests")
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + BATCH_TIMEOUT
+    budget = _Budget(BATCH_MAX_RESPONSE_BYTES)
+    concurrency = min(data.concurrency, BATCH_MAX_CONCURRENCY)
+
+    async def run(item: BatchItem) -> Result:
+        if item.method.upper() != "GET":
+            return _error(405, "Only GET sub-requests are supported")
+        path = urlsplit(item.path).path
+        if not path.startswith("/") or path.startswith(_EXCLUDED_PREFIXES):
+            return _error(400, f"{path} cannot be part of a batch")
+        if loop.time() >= deadline:
+            return _error(504, "Batch time limit reached before this sub-request started")
+        if budget.exceeded:
+            return _error(413, "batch response size limit reached")
+        return await _dispatch(request, item, budget)
+
+    results: List[Result] = []
+    if concurrency == 1:
+        await _begin_snapshot(session)
+        with shared_session(session):
+            for item in data.requests:
+                result = await run(item)
+                if result[0] >= 500 and result[0] != 504:
+                    # the failed sub-request may have left the transaction unusable
+                    await session.rollback()
+                    await _begin_snapshot(session)
+                results.append(result)
+    else:
+        slots = asyncio.Semaphore(concurrency)
+
+        async def limited(item: BatchItem) -> Result:
+            async with slots:
+                return await run(item)
+
+        results = await asyncio.gather(*(limited(item) for item in data.requests))
+
+    body = b'{"responses":[' + b",".join(
+        _item_json(item, result) for item, result in zip(data.requests, results)
+    ) + b"]}"
+    return Response(content=body, media_type="application/json")
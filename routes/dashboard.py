@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import select, func
+from typing import Dict, List, Optional, Tuple
+
+from core.database import DbSession, get_async_session
+from models.models import TaskStatusCounter
+from schemas.task_schema import TaskStatusSummary
+
+router = APIRouter(tags=["Dashboard"])
+
+_GROUP_COLUMNS = {
+    "team": TaskStatusCounter.team_id,
+    "project": TaskStatusCounter.project_id,
+    "assignee": TaskStatusCounter.assigned_to,
+}
+
+
+# -------------------------------
+# Task status summary (reads the counter table, never the task table)
+# -------------------------------
+@router.get("/tasks/summary", response_model=List[TaskStatusSummary])
+async def task_summary(
+    team_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    group_by: List[str] = Query([], description="any of: team, project, assignee"),
+    session: DbSession = Depends(get_async_session)
+):
+    """
+    "12 To-Do / 5 In Progress / 30 Completed" style counts, optionally filtered
+    by team/project/assignee and split per team, project and/or assignee.
+    """
+    group_columns = [_GROUP_COLUMNS[g] for g in dict.fromkeys(group_by) if g in _GROUP_COLUMNS]
+    query = select(*group_columns, TaskStatusCounter.status, func.sum(TaskStatusCounter.count))
+    if team_id is not None:
+        query = query.where(TaskStatusCounter.team_id == team_id)
+    if project_id is not None:
+        query = query.where(TaskStatusCounter.project_id == project_id)
+    if user_id is not None:
+        query = query.where(TaskStatusCounter.assigned_to == user_id)
+    query = query.group_by(*group_columns, TaskStatusCounter.status)
+
+    groups: Dict[Tuple, Dict[str, int]] = {}
+    for row in (await session.exec(query)).all():
+        *key, status, count = row
+        if count:
+            groups.setdefault(tuple(key), {})[status] = int(count)
+    if not group_columns and not groups:
+        groups[()] = {}
+
+    return [
+        TaskStatusSummary(
+            **{c.key: v for c, v in zip(group_columns, key)},
+            counts=counts,
+            total=sum(counts.values()),
+        )
+        for key, counts in sorted(groups.items())
+    ]
@@ -0,0 +1,84 @@
+import json
+from typing import AsyncIterator, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from core import events
+from core.security import TokenClaims, get_optional_claims, token_verifier
+
+router = APIRouter(tags=["Events"])
+
+# Idle connections get a comment/ping this often so proxies keep them open
+KEEPALIVE_SECONDS = 15.0
+
+
+def _subscribe(claims: Optional[TokenClaims], team_id: List[int], user_id: Optional[int]) -> events.Subscription:
+    # a token scopes the feed to the caller's own teams and tasks
+    if claims:
+        return events.broker.subscribe(claims.teams, claims.user_id)
+    if not team_id and user_id is None:
+        raise HTTPException(400, "Subscribe with a bearer token, team_id or user_id")
+    return events.broker.subscribe(team_id, user_id)
+
+
+# -------------------------------
+# Server-Sent Events
+# -------------------------------
+@router.get("/events/tasks")
+async def task_events_sse(
+    team_id: List[int] = Query([]),
+    user_id: Optional[int] = None,
+    claims: Optional[TokenClaims] = Depends(get_optional_claims),
+):
+    """Push task.created / task.status events instead of polling the task lists."""
+    sub = _subscribe(claims, team_id, user_id)
+
+    async def stream() -> AsyncIterator[str]:
+        try:
+            yield ": connected\n\n"
+            while True:
+                event = await sub.get(timeout=KEEPALIVE_SECONDS)
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"id: {event.id}\nevent: {event.type}\ndata: {event.model_dump_json()}\n\n"
+        finally:
+            events.broker.unsubscribe(sub)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# -------------------------------
+# WebSocket (token as query param, since browsers cannot set headers here)
+# -------------------------------
+@router.websocket("/ws/tasks")
+async def task_events_ws(
+    websocket: WebSocket,
+    token: Optional[str] = None,
+    team_id: List[int] = Query([]),
+    user_id: Optional[int] = None,
+):
+    try:
+        claims = token_verifier.verify(token) if token else None
+        sub = _subscribe(claims, team_id, user_id)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=str(e.detail))
+        return
+
+    await websocket.accept()
+    try:
+        while True:
+            event = await sub.get(timeout=KEEPALIVE_SECONDS)
+            if event is None:
+                await websocket.send_text(json.dumps({"type": "ping"}))
+                continue
+            await websocket.send_text(event.model_dump_json())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        events.broker.unsubscribe(sub)
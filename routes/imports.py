@@ -0,0 +1,208 @@
+import codecs
+import csv
+import json
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import ValidationError
+
+from core import bulk, events, jobs
+from core.database import DbSession, get_async_session
+from core.membership import memberships
+from models.models import Project
+from schemas.job_schema import JobRead
+from schemas.task_schema import TaskImportError, TaskImportResult, TaskImportRow
+
+router = APIRouter(tags=["Import"])
+
+# Rows inserted per INSERT/commit, and limits that keep memory bounded
+IMPORT_BATCH_SIZE = 500
+MAX_LINE_CHARS = 64 * 1024
+MAX_REPORTED_ERRORS = 1000
+# Bodies of `background=true` imports are stored in the job row until the worker runs
+IMPORT_JOB_MAX_BYTES = int(os.getenv("IMPORT_JOB_MAX_BYTES", str(20 * 1024 * 1024)))
+
+
+# -------------------------------
+# Incremental parsing of the request body
+# -------------------------------
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode the body chunk by chunk and yield complete lines (newline kept)."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *complete, pending = pending.split("\n")
+        for line in complete:
+            yield line + "\n"
+        if len(pending) > MAX_LINE_CHARS:
+            raise HTTPException(413, f"Line longer than {MAX_LINE_CHARS} characters")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def _ndjson_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    n = 0
+    async for line in _lines(chunks):
+        if not line.strip():
+            continue
+        n += 1
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield n, None, f"invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield n, None, "expected a JSON object"
+            continue
+        yield n, row, None
+
+
+async def _csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    header: Optional[List[str]] = None
+    record = ""
+    n = 0
+    async for line in _lines(chunks):
+        # a quoted field may span lines: keep reading until the quotes balance
+        record += line
+        if record.count('"') % 2:
+            if len(record) > MAX_LINE_CHARS:
+                raise HTTPException(413, f"Record longer than {MAX_LINE_CHARS} characters")
+            continue
+        values = next(csv.reader([record]), [])
+        record = ""
+        if not any(v.strip() for v in values):
+            continue
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        n += 1
+        if len(values) != len(header):
+            yield n, None, f"expected {len(header)} columns, got {len(values)}"
+            continue
+        # empty cells count as missing so column defaults (e.g. status) apply
+        yield n, {k: v for k, v in zip(header, values) if v != ""}, None
+    if record:
+        n += 1
+        yield n, None, "unterminated quoted field"
+
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+    )
+
+
+async def _import_rows(
+    session: DbSession, project: Project, format: str, chunks: AsyncIterator[bytes]
+) -> TaskImportResult:
+    # membership set loaded once for the whole file
+    members = await memberships.team_members(session, project.team_id)
+    rows = _ndjson_rows(chunks) if format == "ndjson" else _csv_rows(chunks)
+
+    result = TaskImportResult(inserted=0, failed=0)
+    batch: List[Dict[str, Any]] = []
+
+    def fail(n: int, error: str) -> None:
+        result.failed += 1
+        if len(result.errors) < MAX_REPORTED_ERRORS:
+            result.errors.append(TaskImportError(row=n, error=error))
+        else:
+            result.errors_truncated = True
+
+    async def flush() -> None:
+        tasks = await session.run_sync(bulk.insert_tasks, batch, team_id=project.team_id)
+        await session.commit()
+        await events.publish_tasks("task.created", project.team_id, tasks)
+        result.inserted += len(batch)
+        batch.clear()
+
+    async for n, raw, error in rows:
+        if error:
+            fail(n, error)
+            continue
+        try:
+            row = TaskImportRow(**raw)
+        except ValidationError as e:
+            fail(n, _validation_message(e))
+            continue
+        if row.assigned_to not in members:
+            fail(n, f"user {row.assigned_to} is not a member of the project team")
+            continue
+        batch.append({
+            "title": row.title,
+            "description": row.description,
+            "status": row.status,
+            "project_id": project.id,
+            "assigned_to": row.assigned_to,
+        })
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+    return result
+
+
+async def _read_body(request: Request, limit: int) -> bytes:
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise HTTPException(413, f"Background imports are limited to {limit} bytes")
+    return bytes(body)
+
+
+# -------------------------------
+# Import tasks into a project (CSV or NDJSON body)
+# -------------------------------
+@router.post(
+    "/import_tasks/{project_id}",
+    response_model=TaskImportResult,
+    responses={202: {"model": JobRead, "description": "Queued (`background=true`); poll the Location"}},
+)
+async def import_tasks(
+    project_id: int,
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    background: bool = False,
+    session: DbSession = Depends(get_async_session)
+):
+    """
+    Stream a CSV (header: title,description,assigned_to[,status]) or NDJSON body
+    into tasks. Bad rows are reported and skipped; good rows are inserted in
+    batches of IMPORT_BATCH_SIZE, each committed on its own. With
+    `background=true` the body (up to IMPORT_JOB_MAX_BYTES) is stored and
+    imported by the worker; the job result is this endpoint's usual report.
+    """
+    project = await session.get(Project, project_id)
+    if not project:
+        raise HTTPException(404, "Project not found")
+
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "ndjson" if ("ndjson" in content_type or "jsonl" in content_type) else "csv"
+
+    if background:
+        try:
+            body = (await _read_body(request, IMPORT_JOB_MAX_BYTES)).decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise HTTPException(400, "Body is not valid UTF-8")
+        # batches commit one by one, so a retry would insert the earlier ones again
+        return await jobs.accepted(
+            session, "import_tasks", {"project_id": project_id, "format": format, "body": body}, max_attempts=1
+        )
+    return await _import_rows(session, project, format, request.stream())
+
+
+@jobs.handler("import_tasks")
+async def _import_tasks_job(session: DbSession, payload: Dict[str, Any]) -> Dict[str, Any]:
+    project = await session.get(Project, payload["project_id"])
+    if not project:
+        raise LookupError(f"project {payload['project_id']} no longer exists")
+
+    async def chunks() -> AsyncIterator[bytes]:
+        yield payload["body"].encode("utf-8")
+
+    return (await _import_rows(session, project, payload["format"], chunks())).model_dump()
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from core import jobs
+from core.database import DbSession, get_async_session
+from models.models import Job
+from schemas.job_schema import JobRead
+
+router = APIRouter(tags=["Jobs"])
+
+
+# -------------------------------
+# Background job status (poll the Location of a 202 response)
+# -------------------------------
+@router.get("/jobs/{job_id}", response_model=JobRead)
+async def get_job(job_id: int, session: DbSession = Depends(get_async_session)):
+    job = await session.get(Job, job_id)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    return jobs.job_read(job)
@@ -1,12 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
-from typing import List, Optional
-
-from core.database import get_session
-from models.models import Project, Task, User, TeamMemberLink, Team
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import case, tuple_, update
+from sqlmodel import select
+from typing import Any, Dict, List, Optional, Tuple
+
+from core import archive, bulk, changes, counters, events, jobs, versions
+from core.database import DbSession, get_async_session
+from core.membership import memberships
+from core.pagination import PageParams, apply_keyset, trim_page, stream_json_array
+from core.security import TokenClaims, get_optional_claims
+from core.serialization import RowSerializer
+from models.models import Project, Task, User, Team, utcnow
+from schemas.job_schema import JobRead
 from schemas.project_schema import ProjectCreate, ProjectRead
 from schemas.task_schema import TaskCreate, TaskRead
-from schemas.task_schema import TaskStatusUpdate
+from schemas.task_schema import (
+    TaskStatusUpdate, TaskStatusBatchItem, TaskStatusBatchUpdate, TaskStatusBatchResult
+)
 from pydantic import BaseModel, Field
 
 
@@ -35,64 +44,61 @@ class ProjectWithTasksOut(BaseModel):
 
 
 @router.post("/project_with_tasks", response_model=ProjectWithTasksOut)
-def create_project_with_tasks(
+async def create_project_with_tasks(
     data: ProjectWithTasksIn,
-    admin_id: int = 1,  # TODO auth
-    session: Session = Depends(get_session)
+    admin_id: int = 1,  # only used when no bearer token is sent
+    claims: Optional[TokenClaims] = Depends(get_optional_claims),
+    session: DbSession = Depends(get_async_session)
 ):
-    # verify admin belongs to team
-    if not session.exec(
-        select(TeamMemberLink).where(
-            TeamMemberLink.team_id == data.team_id,
-            TeamMemberLink.user_id == admin_id,
-        )
-    ).first():
+    if claims:
+        admin_id = claims.user_id
+    # verify admin belongs to team (token claims first, membership cache as fallback)
+    if not (claims and data.team_id in claims.teams) and not (
+        await memberships.is_member(session, data.team_id, admin_id)
+    ):
         raise HTTPException(400, "Admin must be in the team")
 
-    # 1. create project
-    proj = Project(
-        name=data.name,
-        description=data.description,
-        team_id=data.team_id,
-        created_by=admin_id,
-    )
-    session.add(proj)
-    session.commit()
-    session.refresh(proj)
-
-    # 2. create individual tasks
-    tasks: List[Task] = []
-    for row in data.members:
-        t = Task(
-            title=row.task_title,
-            description=row.task_desc,
-            project_id=proj.id,
-            assigned_to=row.user_id,
+    # project + one task per member in a single transaction, no re-reads
+    def write(sync_session):
+        proj = bulk.insert_project(
+            sync_session,
+            name=data.name,
+            description=data.description,
+            team_id=data.team_id,
+            created_by=admin_id,
         )
-        session.add(t)
-        tasks.append(t)
-    session.commit()
-    for t in tasks:
-        session.refresh(t)
-
+        tasks = bulk.insert_tasks(sync_session, (
+            {
+                "title": row.task_title,
+                "description": row.task_desc,
+                "project_id": proj.id,
+                "assigned_to": row.user_id,
+            }
+            for row in data.members
+        ), team_id=data.team_id)
+        return proj, tasks
+
+    proj, tasks = await session.run_sync(write)
+    await session.commit()
+    await events.publish_tasks("task.created", data.team_id, tasks)
     return ProjectWithTasksOut(project=proj, tasks=tasks)
 
 # -------------------------------
 # Create Project
 # -------------------------------
 @router.post("/create_project", response_model=ProjectRead)
-def create_project(
+async def create_project(
     data: ProjectCreate,
-    admin_id: int = 1,               # TODO: replace with real auth user
-    session: Session = Depends(get_session)
+    admin_id: int = 1,               # only used when no bearer token is sent
+    claims: Optional[TokenClaims] = Depends(get_optional_claims),
+    session: DbSession = Depends(get_async_session)
 ):
-    # verify admin is in the team
-    link = session.exec(
-        select(TeamMemberLink).where(
-            TeamMemberLink.team_id == data.team_id,
-            TeamMemberLink.user_id == admin_id
-        )
-    ).first()
+    if claims:
+        admin_id = claims.user_id
+    # verify admin is in the team (token claims first, membership cache as fallback)
+    link = (claims and data.team_id in claims.teams) or (
+        await memberships.is_member(session, data.team_id, admin_id)
+    )
     if not link:
         raise HTTPException(400, "Admin must be part of the team")
 
@@ -103,39 +109,57 @@ def create_project(
         created_by=admin_id
     )
     session.add(proj)
-    session.commit()
-    session.refresh(proj)
+    await session.flush()
+    await session.run_sync(versions.bump, versions.project_scopes(data.team_id))
+    await session.run_sync(changes.record, "project", [proj.id], "create")
+    await session.commit()
+    await session.refresh(proj)
     return proj
 
 
 # -------------------------------
 # List Projects by Team
 # -------------------------------
+project_rows = RowSerializer(ProjectRead, select(*bulk.PROJECT_COLUMNS))
+
+
 @router.get("/projects", response_model=List[ProjectRead])
-def list_projects(team_id: int, session: Session = Depends(get_session)):
-    return session.exec(select(Project).where(Project.team_id == team_id)).all()
+async def list_projects(
+    team_id: int,
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    session: DbSession = Depends(get_async_session)
+):
+    unchanged = await versions.not_modified(request, response, session, f"project:team:{team_id}")
+    if unchanged:
+        return unchanged
+
+    query = apply_keyset(
+        select(*bulk.PROJECT_COLUMNS).where(Project.team_id == team_id), Project.id, page
+    )
+    if page.stream:
+        return await stream_json_array(
+            session, query, Project.id, page, lambda _, p: project_rows.dumps_row(p),
+            headers=versions.validators(response),
+        )
+    return project_rows.response(trim_page((await session.exec(query)).all(), page, response), response)
 
 
 # -------------------------------
 # Create Task inside Project
 # -------------------------------
 @router.post("/create_task", response_model=TaskRead)
-def create_task(
+async def create_task(
     data: TaskCreate,
     project_id: int,
-    session: Session = Depends(get_session)
+    session: DbSession = Depends(get_async_session)
 ):
     # verify assignee is member of the project team
-    project = session.get(Project, project_id)
+    project = await session.get(Project, project_id)
     if not project:
         raise HTTPException(404, "Project not found")
-    member_link = session.exec(
-        select(TeamMemberLink).where(
-            TeamMemberLink.team_id == project.team_id,
-            TeamMemberLink.user_id == data.assigned_to
-        )
-    ).first()
-    if not member_link:
+    if not await memberships.is_member(session, project.team_id, data.assigned_to):
         raise HTTPException(400, "Assigned user must be a member of the project team")
 
     task = Task(
@@ -145,8 +169,15 @@ def create_task(
         assigned_to=data.assigned_to
     )
     session.add(task)
-    session.commit()
-    session.refresh(task)
+    await session.run_sync(
+        counters.apply_deltas, counters.new_task_deltas(project.team_id, [task])
+    )
+    await session.run_sync(versions.bump, versions.task_scopes(project.team_id, [task]))
+    await session.flush()
+    await session.run_sync(changes.record, "task", [task.id], "create")
+    await session.commit()
+    await session.refresh(task)
+    await events.publish_tasks("task.created", project.team_id, [TaskRead.model_validate(task)])
     return task
 
 
@@ -159,78 +190,208 @@ class BulkTaskCreate(BaseModel):
     assigned_to: List[int]          # array of member ids
 
 
-@router.post("/bulk_tasks/{project_id}", response_model=List[TaskRead])
-def bulk_create_tasks(
+async def _insert_bulk_tasks(
+    session: DbSession, project_id: int, team_id: int, data: BulkTaskCreate, from_job: bool = False
+) -> List[TaskRead]:
+    tasks = await session.run_sync(bulk.insert_tasks, [
+        {
+            "title": data.title,
+            "description": data.description,
+            "project_id": project_id,
+            "assigned_to": uid,
+        }
+        for uid in data.assigned_to
+    ], team_id=team_id)
+    if from_job:
+        await jobs.record_result(session, {"task_ids": [t.id for t in tasks]})
+    await session.commit()
+    await events.publish_tasks("task.created", team_id, tasks)
+    return tasks
+
+
+@router.post(
+    "/bulk_tasks/{project_id}",
+    response_model=List[TaskRead],
+    responses={202: {"model": JobRead, "description": "Queued (`background=true`); poll the Location"}},
+)
+async def bulk_create_tasks(
     project_id: int,
     data: BulkTaskCreate,
-    session: Session = Depends(get_session)
+    background: bool = False,
+    session: DbSession = Depends(get_async_session)
 ):
-    project = session.get(Project, project_id)
+    project = await session.get(Project, project_id)
     if not project:
         raise HTTPException(404, "Project not found")
 
     # verify all users are actually members of the team
-    team_id = project.team_id
-    valid = session.exec(
-        select(TeamMemberLink.user_id).where(
-            TeamMemberLink.team_id == team_id,
-            TeamMemberLink.user_id.in_(data.assigned_to)
-        )
-    ).all()
-    if len(valid) != len(data.assigned_to):
+    members = await memberships.team_members(session, project.team_id)
+    if len(members.intersection(data.assigned_to)) != len(data.assigned_to):
         raise HTTPException(400, "One or more users are not in the project team")
 
-    tasks = [
-        Task(
-            title=data.title,
-            description=data.description,
-            project_id=project_id,
-            assigned_to=uid
-        )
-        for uid in data.assigned_to
-    ]
-    session.add_all(tasks)
-    session.commit()
-    for t in tasks:
-        session.refresh(t)
-    return tasks
+    # validated here; the worker only does the insert
+    if background:
+        return await jobs.accepted(session, "bulk_tasks", {
+            "project_id": project_id, "team_id": project.team_id, "data": data.model_dump(),
+        })
+    return await _insert_bulk_tasks(session, project_id, project.team_id, data)
+
+
+@jobs.handler("bulk_tasks")
+async def _bulk_tasks_job(session: DbSession, payload: Dict[str, Any]) -> Dict[str, Any]:
+    # the tasks and the job's result commit together: a retry after a failure
+    # inserts nothing twice, even when the worker died right after that commit
+    done = await jobs.recorded_result(session)
+    if done is not None:
+        return done
+    tasks = await _insert_bulk_tasks(
+        session, payload["project_id"], payload["team_id"], BulkTaskCreate(**payload["data"]), from_job=True
+    )
+    return {"task_ids": [t.id for t in tasks]}
 
 # -------------------------------
 # List Tasks (filter by user or project)
 # -------------------------------
+task_rows = RowSerializer(TaskRead, select(*bulk.TASK_COLUMNS))
+
+
 @router.get("/tasks", response_model=List[TaskRead])
-def list_tasks(
+async def list_tasks(
+    request: Request,
+    response: Response,
     user_id: int | None = None,
     project_id: int | None = None,
-    session: Session = Depends(get_session)
+    include_archived: bool = False,
+    page: PageParams = Depends(),
+    session: DbSession = Depends(get_async_session)
 ):
-    query = select(Task)
+    # the narrowest scope that covers the filter
+    if project_id:
+        scope = f"task:project:{project_id}"
+    elif user_id:
+        scope = f"task:user:{user_id}"
+    else:
+        scope = "task"
+    unchanged = await versions.not_modified(request, response, session, scope)
+    if unchanged:
+        return unchanged
+
+    t = archive.task_source(include_archived)
+    query = select(*bulk.task_columns(t))
     if user_id:
-        query = query.where(Task.assigned_to == user_id)
+        query = query.where(t.assigned_to == user_id)
     if project_id:
-        query = query.where(Task.project_id == project_id)
-    return session.exec(query).all()
+        query = query.where(t.project_id == project_id)
+    query = apply_keyset(query, t.id, page)
+    if page.stream:
+        return await stream_json_array(
+            session, query, t.id, page, lambda _, t: task_rows.dumps_row(t),
+            headers=versions.validators(response),
+        )
+    return task_rows.response(trim_page((await session.exec(query)).all(), page, response), response)
 
 
 # -------------------  NEW  -------------------
 @router.patch("/tasks/{task_id}/status", response_model=TaskRead)
-def update_task_status(
+async def update_task_status(
     task_id: int,
     payload: "TaskStatusUpdate",
-    user_id: int = 1,  # TODO: real auth
-    session: Session = Depends(get_session)
+    user_id: int = 1,  # only used when no bearer token is sent
+    claims: Optional[TokenClaims] = Depends(get_optional_claims),
+    session: DbSession = Depends(get_async_session)
 ):
-    task = session.get(Task, task_id)
+    if claims:
+        user_id = claims.user_id
+    applied, current = await _set_status(
+        session, user_id, payload.status, [TaskStatusBatchItem(id=task_id, version=payload.version)]
+    )
+    if applied:
+        return applied[0]
+
+    task = current.get(task_id)
     if not task:
         raise HTTPException(404, "Task not found")
     # ensure only assignee can update
     if task.assigned_to != user_id:
         raise HTTPException(403, "Not your task")
-    task.status = payload.status
-    session.add(task)
-    session.commit()
-    session.refresh(task)
-    return task
+    raise HTTPException(409, "Task was modified by someone else; reload and retry")
+
+
+async def _set_status(
+    session: DbSession, user_id: int, status: str, items: List[TaskStatusBatchItem]
+) -> Tuple[List[TaskRead], Dict[int, Any]]:
+    """
+    Read the current (status, version) of the requested tasks, then update only
+    the rows still at the version just read: a concurrent edit makes its row
+    drop out instead of being overwritten, and the old status we counted
+    from is guaranteed to be the one replaced. Counters move in the same transaction.
+    """
+    expected = {item.id: item.version for item in items}
+    current = {r.id: r for r in (await session.exec(
+        select(Task.id, Task.status, Task.version, Task.assigned_to, Project.team_id)
+        .join(Project, Task.project_id == Project.id)
+        .where(Task.id.in_(list(expected)))
+    )).all()}
+    pairs = [
+        (task_id, row.version)
+        for task_id, row in current.items()
+        if row.assigned_to == user_id and expected[task_id] in (None, row.version)
+    ]
+    rows = []
+    if pairs:
+        rows = (await session.exec(
+            update(Task)
+            .where(Task.assigned_to == user_id, tuple_(Task.id, Task.version).in_(pairs))
+            .values(
+                status=status,
+                version=Task.version + 1,
+                # a task completed again keeps its first completion time
+                completed_at=case((Task.status == "Completed", Task.completed_at), else_=utcnow())
+                if status == "Completed" else None,
+            )
+            .execution_options(synchronize_session=False)
+            .returning(*bulk.TASK_COLUMNS)
+        )).all()
+        await session.run_sync(counters.apply_deltas, counters.status_change_deltas(
+            (current[r.id].team_id, r.project_id, r.assigned_to, current[r.id].status, status)
+            for r in rows
+        ))
+        await session.run_sync(versions.bump, set().union(
+            *(versions.task_scopes(current[r.id].team_id, [r]) for r in rows)
+        ))
+        await session.run_sync(changes.record, "task", [r.id for r in rows], "update")
+    await session.commit()
+    applied = [TaskRead(**r._mapping) for r in rows]
+    for task in applied:
+        await events.publish_tasks("task.status", current[task.id].team_id, [task])
+    return applied, current
+
+
+# -------------------------------
+# Batch status update (e.g. moving a whole board column)
+# -------------------------------
+@router.patch("/tasks/status", response_model=TaskStatusBatchResult)
+async def update_task_status_batch(
+    payload: TaskStatusBatchUpdate,
+    user_id: int = 1,  # only used when no bearer token is sent
+    claims: Optional[TokenClaims] = Depends(get_optional_claims),
+    session: DbSession = Depends(get_async_session)
+):
+    """
+    Apply one status to many tasks with a single UPDATE. Items carrying a
+    `version` only apply if the task still has it, so concurrent edits are
+    detected without row locks; everything that did not apply is rejected.
+    """
+    if claims:
+        user_id = claims.user_id
+    applied, _ = await _set_status(session, user_id, payload.status, payload.tasks)
+
+    applied_ids = {t.id for t in applied}
+    requested = list(dict.fromkeys(item.id for item in payload.tasks))
+    return TaskStatusBatchResult(
+        applied=[i for i in requested if i in applied_ids],
+        rejected=[i for i in requested if i not in applied_ids],
+    )
 
 
 class TaskAdminRead(BaseModel):
@@ -243,23 +404,51 @@ class TaskAdminRead(BaseModel):
     member_name: str
 
 
-@router.get("/admin/tasks", response_model=list[TaskAdminRead])
-def admin_tasks(session: Session = Depends(get_session)):
-    rows = session.exec(
+def _admin_tasks(t):
+    return (
         select(
-            Task.id,
-            Task.title,
-            Task.description,
-            Task.status,
+            t.id,
+            t.title,
+            t.description,
+            t.status,
             Project.name.label("project_name"),
             Team.name.label("team_name"),
             User.name.label("member_name"),
         )
-        .join(Project, Task.project_id == Project.id)
+        .join(Project, t.project_id == Project.id)
         .join(Team, Project.team_id == Team.id)
-        .join(User, Task.assigned_to == User.id)
-    ).all()
-    return [TaskAdminRead(**r._mapping) for r in rows]
+        .join(User, t.assigned_to == User.id)
+    )
+
+
+_admin_tasks_query = _admin_tasks(Task)
+_admin_tasks_archived_query = _admin_tasks(archive.all_tasks)
+# rows go straight to JSON bytes; the columns are checked against the model here, once
+admin_task_rows = RowSerializer(TaskAdminRead, _admin_tasks_query)
+
+
+@router.get("/admin/tasks", response_model=list[TaskAdminRead])
+async def admin_tasks(
+    request: Request,
+    response: Response,
+    include_archived: bool = False,
+    page: PageParams = Depends(),
+    session: DbSession = Depends(get_async_session)
+):
+    # project / team / user names are never edited, so task changes are all that matter
+    unchanged = await versions.not_modified(request, response, session, "task")
+    if unchanged:
+        return unchanged
+
+    t = archive.task_source(include_archived)
+    base = _admin_tasks_archived_query if include_archived else _admin_tasks_query
+    query = apply_keyset(base, t.id, page)
+    if page.stream:
+        return await stream_json_array(
+            session, query, t.id, page, lambda _, r: admin_task_rows.dumps_row(r),
+            headers=versions.validators(response),
+        )
+    return admin_task_rows.response(trim_page((await session.exec(query)).all(), page, response), response)
 
 
 class TaskMemberRead(BaseModel):
@@ -267,20 +456,48 @@ class TaskMemberRead(BaseModel):
     title: str
     description: Optional[str] = None
     status: str
+    version: int
     project_name: str
 
 
-@router.get("/member/tasks", response_model=list[TaskMemberRead])
-def member_tasks(user_id: int, session: Session = Depends(get_session)):
-    rows = session.exec(
+def _member_tasks(t):
+    return (
         select(
-            Task.id,
-            Task.title,
-            Task.description,
-            Task.status,
+            t.id,
+            t.title,
+            t.description,
+            t.status,
+            t.version,
             Project.name.label("project_name"),
         )
-        .join(Project, Task.project_id == Project.id)
-        .where(Task.assigned_to == user_id)
-    ).all()
-    return [TaskMemberRead(**r._mapping) for r in rows]
+        .join(Project, t.project_id == Project.id)
+    )
+
+
+_member_tasks_query = _member_tasks(Task)
+_member_tasks_archived_query = _member_tasks(archive.all_tasks)
+member_task_rows = RowSerializer(TaskMemberRead, _member_tasks_query)
+
+
+@router.get("/member/tasks", response_model=list[TaskMemberRead])
+async def member_tasks(
+    user_id: int,
+    request: Request,
+    response: Response,
+    include_archived: bool = False,
+    page: PageParams = Depends(),
+    session: DbSession = Depends(get_async_session)
+):
+    unchanged = await versions.not_modified(request, response, session, f"task:user:{user_id}")
+    if unchanged:
+        return unchanged
+
+    t = archive.task_source(include_archived)
+    base = _member_tasks_archived_query if include_archived else _member_tasks_query
+    query = apply_keyset(base.where(t.assigned_to == user_id), t.id, page)
+    if page.stream:
+        return await stream_json_array(
+            session, query, t.id, page, lambda _, r: member_task_rows.dumps_row(r),
+            headers=versions.validators(response),
+        )
+    return member_task_rows.response(trim_page((await session.exec(query)).all(), page, response), response)
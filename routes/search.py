@@ -0,0 +1,55 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from core import search
+from core.database import DbSession, get_async_session
+from schemas.search_schema import SearchHit, SearchResults
+
+router = APIRouter(tags=["Search"])
+
+_RESULT_LISTS = {"task": "tasks", "project": "projects", "team": "teams"}
+
+
+# -------------------------------
+# Full-text search over tasks, projects and teams
+# -------------------------------
+@router.get("/search", response_model=SearchResults)
+async def search_all(
+    q: str = Query(..., min_length=1, max_length=200),
+    types: List[str] = Query(["task", "project", "team"], description="any of: task, project, team"),
+    team_id: Optional[int] = None,
+    project_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    include_archived: bool = False,
+    session: DbSession = Depends(get_async_session)
+):
+    """
+    Words in task titles/descriptions and project/team names/descriptions.
+    Every word must match (as a prefix, so "desig rev" finds "design review");
+    hits are ranked with title/name matches first. `team_id` / `project_id` /
+    `user_id` narrow the results (for projects and teams, `user_id` means
+    "teams the user is a member of"). Archived tasks are found only with
+    `include_archived=true`.
+    """
+    unknown = set(types) - set(_RESULT_LISTS)
+    if unknown:
+        raise HTTPException(400, f"Unknown search type(s): {', '.join(sorted(unknown))}")
+
+    results = SearchResults(query=q)
+    words = search.terms(q)
+    if not words:
+        return results
+
+    dialect = session.get_bind().dialect.name
+    for entity in dict.fromkeys(types):
+        rows = (await session.exec(search.search_query(
+            dialect, entity, words, limit, team_id=team_id, project_id=project_id, user_id=user_id,
+            include_archived=include_archived,
+        ))).all()
+        setattr(results, _RESULT_LISTS[entity], [
+            SearchHit(**r._mapping, snippet=search.snippet(r.body, words) or search.snippet(r.title, words))
+            for r in rows
+        ])
+    return results
@@ -0,0 +1,91 @@
+from typing import Dict, List
+
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import func, select
+
+from core import bulk, changes
+from core.database import DbSession, get_async_session
+from models.models import ChangeLog, ChangeVersion, Project, Task, Team, User
+from routes.auth import users_query
+from routes.team import team_with_creator, teams_query
+from schemas.project_schema import ProjectRead
+from schemas.sync_schema import SyncDeleted, SyncResponse
+from schemas.task_schema import TaskRead
+from schemas.user_schema import UserRead
+
+router = APIRouter(tags=["Sync"])
+
+
+# -------------------------------
+# Delta sync: everything created, changed or deleted after a change log seq
+# -------------------------------
+@router.get("/sync", response_model=SyncResponse)
+async def sync(
+    since: int = Query(0, ge=0, description="`seq` of the previous response; 0 on first load"),
+    limit: int = Query(1000, ge=1, le=5000, description="max change log entries per call"),
+    session: DbSession = Depends(get_async_session),
+):
+    """
+    Replays the change log after `since`. Each entity changed in that range
+    comes back once, in its current state (or as a deleted id), so a client
+    applies the lists as upserts and stores `seq` for the next call.
+
+    `full_resync` means the cursor cannot be served -- first load, older than
+    the compacted part of the log, or from another database: fetch the full
+    lists (/tasks, /projects, /teams_list, /users_list), then sync from `seq`.
+    """
+    floor = (await session.exec(
+        select(ChangeVersion.version).where(ChangeVersion.scope == changes.COMPACTED_SCOPE)
+    )).first() or 0
+    head = max((await session.exec(select(func.max(ChangeLog.seq)))).first() or 0, floor)
+    if since == 0 or since < floor or since > head:
+        return SyncResponse(seq=head, full_resync=True)
+
+    entries = (await session.exec(
+        select(ChangeLog.seq, ChangeLog.entity, ChangeLog.entity_id, ChangeLog.op)
+        .where(ChangeLog.seq > since)
+        .order_by(ChangeLog.seq)
+        .limit(limit + 1)
+    )).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # the last op per entity wins; rows still present are sent as they are now
+    last_op: Dict[str, Dict[int, str]] = {entity: {} for entity in changes.ENTITIES}
+    for entry in entries:
+        last_op[entry.entity][entry.entity_id] = entry.op
+
+    def live(entity: str) -> List[int]:
+        return [i for i, op in last_op[entity].items() if op != "delete"]
+
+    tasks = [TaskRead(**r._mapping) for r in (await session.exec(
+        select(*bulk.TASK_COLUMNS).where(Task.id.in_(live("task"))).order_by(Task.id)
+    )).all()] if live("task") else []
+    projects = [ProjectRead(**r._mapping) for r in (await session.exec(
+        select(*bulk.PROJECT_COLUMNS).where(Project.id.in_(live("project"))).order_by(Project.id)
+    )).all()] if live("project") else []
+    teams = [team_with_creator(r) for r in (await session.exec(
+        teams_query(session).where(Team.id.in_(live("team"))).order_by(Team.id)
+    )).all()] if live("team") else []
+    users = [UserRead(**r._mapping) for r in (await session.exec(
+        users_query.where(User.id.in_(live("user"))).order_by(User.id)
+    )).all()] if live("user") else []
+
+    def gone(entity: str, present) -> List[int]:
+        found = {row.id for row in present}
+        return sorted(i for i in last_op[entity] if i not in found)
+
+    return SyncResponse(
+        seq=entries[-1].seq if entries else since,
+        has_more=has_more,
+        tasks=tasks,
+        projects=projects,
+        teams=teams,
+        users=users,
+        deleted=SyncDeleted(
+            tasks=gone("task", tasks),
+            projects=gone("project", projects),
+            teams=gone("team", teams),
+            users=gone("user", users),
+        ),
+    )
@@ -1,7 +1,14 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlmodel import Session, select
-from typing import List
-from core.database import get_session
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from sqlmodel import select, func
+from typing import List, Optional
+from core import bulk, versions
+from core.cache import teams_cache
+from core.database import DbSession, get_async_session
+from core.membership import memberships
+from core.pagination import (
+    NEXT_CURSOR_HEADER, PageParams, apply_keyset, trim_page, stream_json_array
+)
+from core.security import TokenClaims, get_optional_claims
 from models.models import User, Team, TeamMemberLink
 from schemas.team_schema import TeamCreate, TeamRead, TeamReadWithCreator
 
@@ -11,60 +18,116 @@ router = APIRouter()
 # Create a Team and Add Members
 # -------------------------------
 @router.post("/create_team", response_model=TeamRead)
-def create_team(team_data: TeamCreate, session: Session = Depends(get_session)):
+async def create_team(
+    team_data: TeamCreate,
+    claims: Optional[TokenClaims] = Depends(get_optional_claims),
+    session: DbSession = Depends(get_async_session)
+):
     """
     Admin creates a team and adds registered members.
     """
     #  Validate member IDs
-    members = session.exec(select(User).where(User.id.in_(team_data.member_ids))).all()
+    members = (await session.exec(select(User.id).where(User.id.in_(team_data.member_ids)))).all()
     if len(members) != len(team_data.member_ids):
         raise HTTPException(status_code=400, detail="One or more user IDs are invalid")
 
-    #  Create team
-    new_team = Team(
-        name=team_data.name,
-        description=team_data.description,
-        created_by=1  # TODO: replace with actual admin ID from auth session
-    )
-    session.add(new_team)
-    session.commit()
-    session.refresh(new_team)
+    #  Create team and link members (many-to-many) in one transaction
+    created_by = claims.user_id if claims else 1  # 1 = legacy default without a token
+
+    def write(sync_session):
+        team_id = bulk.insert_team(
+            sync_session,
+            name=team_data.name,
+            description=team_data.description,
+            created_by=created_by,
+        )
+        bulk.insert_team_members(sync_session, team_id, members)
+        return team_id
 
-    #  Link members (many-to-many)
-    for member in members:
-        link = TeamMemberLink(team_id=new_team.id, user_id=member.id)
-        session.add(link)
-    session.commit()
+    team_id = await session.run_sync(write)
+    await session.commit()
+    teams_cache.invalidate()
+    await memberships.invalidate(team_ids=[team_id], user_ids=members)
 
     #  Return response
     return TeamRead(
-        id=new_team.id,
-        name=new_team.name,
-        description=new_team.description,
-        created_by=new_team.created_by,
+        id=team_id,
+        name=team_data.name,
+        description=team_data.description,
+        created_by=created_by,
         member_ids=team_data.member_ids
     )
 
 # -------------------------------
 # List All Teams with Members
 # -------------------------------
+def teams_query(session: DbSession):
+    """
+    One round trip for the whole list: creator name via join,
+    member ids aggregated per team (array_agg on Postgres, group_concat elsewhere).
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        member_ids = func.array_agg(TeamMemberLink.user_id)
+    else:
+        member_ids = func.group_concat(TeamMemberLink.user_id)
+    return (
+        select(
+            Team.id,
+            Team.name,
+            Team.description,
+            User.name.label("creator_name"),
+            member_ids.label("member_ids"),
+        )
+        .outerjoin(User, Team.created_by == User.id)
+        .outerjoin(TeamMemberLink, TeamMemberLink.team_id == Team.id)
+        .group_by(Team.id, Team.name, Team.description, User.name)
+    )
+
+
+def team_with_creator(row) -> TeamReadWithCreator:
+    ids = row.member_ids
+    if isinstance(ids, str):
+        ids = [int(i) for i in ids.split(",")]
+    return TeamReadWithCreator(
+        id=row.id,
+        name=row.name,
+        description=row.description,
+        created_by_name=row.creator_name or "Unknown",
+        member_ids=sorted(i for i in ids or [] if i is not None),
+    )
+
+
 @router.get("/teams_list", response_model=list[TeamReadWithCreator])
-def list_teams(session: Session = Depends(get_session)):
-    teams = session.exec(select(Team)).all()
-    result = []
-    for team in teams:
-        member_links = session.exec(
-            select(TeamMemberLink).where(TeamMemberLink.team_id == team.id)
-        ).all()
-        member_ids = [link.user_id for link in member_links]
-        creator = session.get(User, team.created_by)
-        result.append(
-            TeamReadWithCreator(
-                id=team.id,
-                name=team.name,
-                description=team.description,
-                created_by_name=creator.name if creator else "Unknown",
-                member_ids=member_ids,
-            )
+async def list_teams(
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    session: DbSession = Depends(get_async_session)
+):
+    unchanged = await versions.not_modified(request, response, session, "team")
+    if unchanged:
+        return unchanged
+
+    query = apply_keyset(teams_query(session), Team.id, page)
+    if page.stream:
+        return await stream_json_array(
+            session, query, Team.id, page, lambda _, row: team_with_creator(row).model_dump_json(),
+            headers=versions.validators(response),
+        )
+
+    # the ETag carries the database-wide "team" version: a body cached before
+    # another worker's create_team is never served under the newer tag
+    key = (page.limit, page.after_id, response.headers["etag"])
+    cached = teams_cache.get(key)
+    if cached is None:
+        generation = teams_cache.generation
+        rows = trim_page((await session.exec(query)).all(), page, response)
+        cached = (
+            [team_with_creator(row) for row in rows],
+            response.headers.get(NEXT_CURSOR_HEADER),
         )
-    return result
+        teams_cache.set(key, cached, generation)
+    teams, next_cursor = cached
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return teams
@@ -0,0 +1,82 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.orm import load_only, selectinload
+from sqlmodel import select
+
+from core import versions
+from core.database import DbSession, get_async_session
+from core.membership import memberships
+from models.models import Project, Team, User
+from schemas.task_schema import TaskRead
+from schemas.user_schema import UserRead
+from schemas.workspace_schema import WorkspaceProject, WorkspaceRead, WorkspaceTeam
+
+router = APIRouter(tags=["Workspace"])
+
+# password hashes stay in the database
+_user_columns = load_only(User.id, User.name, User.email, User.is_admin, User.role)
+
+# user -> teams -> (members, projects -> tasks): one SELECT per level, each
+# loading the whole level with WHERE ... IN (parent ids), so five queries
+# whatever the number of teams or projects
+_workspace_query = select(User).options(
+    _user_columns,
+    selectinload(User.teams).options(
+        selectinload(Team.members).options(_user_columns),
+        selectinload(Team.projects).selectinload(Project.tasks),
+    ),
+)
+
+
+# -------------------------------
+# Everything a member's home screen shows, in one response
+# -------------------------------
+@router.get("/users/{user_id}/workspace", response_model=WorkspaceRead)
+async def user_workspace(
+    user_id: int,
+    request: Request,
+    response: Response,
+    session: DbSession = Depends(get_async_session)
+):
+    """
+    The user's teams with their members, projects and tasks, normalized:
+    each entity appears once in its id-keyed map and the others refer to it
+    by id. Replaces /member/tasks + /projects per team + /teams_list +
+    /users_list on page load.
+    """
+    # "team" covers membership changes, the per-team scopes the projects and tasks
+    team_ids = await memberships.user_teams(session, user_id)
+    unchanged = await versions.not_modified(request, response, session, "team", "user", *(
+        scope for t in team_ids for scope in (f"project:team:{t}", f"task:team:{t}")
+    ))
+    if unchanged:
+        return unchanged
+
+    user = (await session.exec(_workspace_query.where(User.id == user_id))).first()
+    if not user:
+        raise HTTPException(404, "User not found")
+
+    workspace = WorkspaceRead(user_id=user.id, users={user.id: UserRead.model_validate(user)})
+    for team in user.teams:
+        workspace.teams[team.id] = WorkspaceTeam(
+            id=team.id,
+            name=team.name,
+            description=team.description,
+            created_by=team.created_by,
+            member_ids=sorted(m.id for m in team.members),
+            project_ids=sorted(p.id for p in team.projects),
+        )
+        for member in team.members:
+            if member.id not in workspace.users:
+                workspace.users[member.id] = UserRead.model_validate(member)
+        for project in team.projects:
+            workspace.projects[project.id] = WorkspaceProject(
+                id=project.id,
+                name=project.name,
+                description=project.description,
+                team_id=project.team_id,
+                created_by=project.created_by,
+                task_ids=sorted(t.id for t in project.tasks),
+            )
+            for task in project.tasks:
+                workspace.tasks[task.id] = TaskRead.model_validate(task)
+    return workspace
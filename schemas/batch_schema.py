@@ -0,0 +1,30 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional, Union
+
+ParamValue = Union[str, int, float, bool]
+
+
+class BatchItem(BaseModel):
+    id: Optional[str] = Field(None, max_length=64)   # echoed back, to match results
+    method: str = "GET"                              # only GET is dispatched
+    path: str = Field(..., min_length=1, max_length=2048)    # e.g. "/tasks?project_id=3"
+    params: Dict[str, Union[ParamValue, List[ParamValue]]] = {}  # added to the query string
+    headers: Dict[str, str] = {}                     # e.g. If-None-Match
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem] = Field(..., min_length=1)
+    # 1 -> one after another on one shared session (a single snapshot);
+    # >1 -> that many at a time, each on its own session
+    concurrency: int = Field(1, ge=1)
+
+
+class BatchItemResult(BaseModel):
+    id: Optional[str] = None
+    status: int
+    headers: Dict[str, str] = {}
+    body: Any = None               # the route's JSON (text for other content types, base64 if encoded)
+
+
+class BatchResponse(BaseModel):
+    responses: List[BatchItemResult]   # in request order
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+
+
+class JobRead(BaseModel):
+    id: int
+    kind: str
+    status: str                            # queued / running / succeeded / failed
+    attempts: int
+    max_attempts: int
+    result: Optional[Dict[str, Any]] = None  # set once the job succeeded
+    error: Optional[str] = None            # last failure (also set while a retry is queued)
+    created_at: float                      # unix time
+    updated_at: float
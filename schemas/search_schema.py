@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class SearchHit(BaseModel):
+    id: int
+    title: str                      # task title, or project / team name
+    snippet: Optional[str] = None   # matched text with the hits wrapped in [ ]
+    score: float                    # higher is better; comparable within one list only
+    team_id: Optional[int] = None
+    project_id: Optional[int] = None
+    assigned_to: Optional[int] = None
+
+
+class SearchResults(BaseModel):
+    query: str
+    tasks: List[SearchHit] = []
+    projects: List[SearchHit] = []
+    teams: List[SearchHit] = []
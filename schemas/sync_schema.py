@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import List
+
+from schemas.project_schema import ProjectRead
+from schemas.task_schema import TaskRead
+from schemas.team_schema import TeamReadWithCreator
+from schemas.user_schema import UserRead
+
+
+class SyncDeleted(BaseModel):
+    tasks: List[int] = []
+    projects: List[int] = []
+    teams: List[int] = []
+    users: List[int] = []
+
+
+class SyncResponse(BaseModel):
+    seq: int                     # pass as `since` on the next call
+    full_resync: bool = False    # cursor unknown or compacted away: refetch the full lists
+    has_more: bool = False       # more changes after `seq`; call again right away
+    tasks: List[TaskRead] = []   # created or changed, current state
+    projects: List[ProjectRead] = []
+    teams: List[TeamReadWithCreator] = []
+    users: List[UserRead] = []
+    deleted: SyncDeleted = SyncDeleted()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Dict, List, Optional
 
 
 class TaskCreate(BaseModel):
@@ -15,11 +15,51 @@ class TaskRead(BaseModel):
     status: str
     project_id: int
     assigned_to: int
+    version: int = 1
 
     model_config = {"from_attributes": True}
 
 
 class TaskStatusUpdate(BaseModel):
     status: str = Field(..., pattern="^(To-Do|In Progress|Completed)$")
+    version: Optional[int] = None     # when set, the update only applies to this version
 
 
+class TaskStatusBatchItem(BaseModel):
+    id: int
+    version: Optional[int] = None
+
+
+class TaskStatusBatchUpdate(BaseModel):
+    status: str = Field(..., pattern="^(To-Do|In Progress|Completed)$")
+    tasks: List[TaskStatusBatchItem] = Field(..., min_length=1, max_length=1000)
+
+
+class TaskStatusBatchResult(BaseModel):
+    applied: List[int]        # ids updated (their version was bumped)
+    rejected: List[int]       # missing, not yours, or changed since the given version
+
+
+class TaskImportRow(TaskCreate):
+    status: str = Field("To-Do", pattern="^(To-Do|In Progress|Completed)$")
+
+
+class TaskImportError(BaseModel):
+    row: int                  # 1-based data row (CSV header not counted)
+    error: str
+
+
+class TaskImportResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[TaskImportError] = []
+    errors_truncated: bool = False
+
+class TaskStatusSummary(BaseModel):
+    # set for the dimensions the summary was grouped by, None otherwise
+    team_id: Optional[int] = None
+    project_id: Optional[int] = None
+    assigned_to: Optional[int] = None
+    counts: Dict[str, int]       # status -> number of tasks
+    total: int
+
@@ -0,0 +1,32 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+from schemas.task_schema import TaskRead
+from schemas.user_schema import UserRead
+
+
+class WorkspaceTeam(BaseModel):
+    id: int
+    name: str
+    description: Optional[str] = None
+    created_by: int
+    member_ids: List[int] = []     # keys into `users`
+    project_ids: List[int] = []    # keys into `projects`
+
+
+class WorkspaceProject(BaseModel):
+    id: int
+    name: str
+    description: Optional[str] = None
+    team_id: int
+    created_by: int
+    task_ids: List[int] = []       # keys into `tasks`
+
+
+class WorkspaceRead(BaseModel):
+    # every entity once, keyed by id; teams and projects refer to the others by id
+    user_id: int
+    teams: Dict[int, WorkspaceTeam] = {}
+    projects: Dict[int, WorkspaceProject] = {}
+    tasks: Dict[int, TaskRead] = {}
+    users: Dict[int, UserRead] = {}
@@ -0,0 +1,53 @@
+"""
+The app runs against a throwaway SQLite database that the startup event
+creates and migrates. Configuration is read at import time, so the
+environment is set here, before anything from the app is imported.
+"""
+import itertools
+import os
+import tempfile
+from types import SimpleNamespace
+
+_tmp = tempfile.mkdtemp(prefix="team_collab_tests_")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_tmp, "test.db")
+os.environ["MEMBERSHIP_CACHE_PATH"] = os.path.join(_tmp, "membership_cache.sqlite")
+os.environ["AUTH_SECRET_KEY"] = "test-secret"
+os.environ["BCRYPT_ROUNDS"] = "4"           # the minimum; hashing cost is not under test
+os.environ["PASSWORD_HASH_WORKERS"] = "0"   # hash inline
+os.environ["ADMISSION_CONTROL"] = "off"     # tests fire requests back to back
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+
+_unique = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as c:   # runs the startup event, i.e. the migrations
+        yield c
+
+
+@pytest.fixture(scope="session")
+def engine(client):
+    from core.database import engine
+    return engine
+
+
+@pytest.fixture
+def team(client):
+    """Two fresh members, a team and a project of their own."""
+    n = next(_unique)
+    members = [
+        client.post(
+            "/signup", json={"name": f"member{n}x{i}", "email": f"member{n}x{i}@example.com", "password": "secret1"}
+        ).json()["id"]
+        for i in range(2)
+    ]
+    team_id = client.post("/create_team", json={"name": f"team{n}", "member_ids": members}).json()["id"]
+    project_id = client.post(
+        f"/create_project?admin_id={members[0]}", json={"name": f"project{n}", "team_id": team_id}
+    ).json()["id"]
+    return SimpleNamespace(members=members, team_id=team_id, project_id=project_id)
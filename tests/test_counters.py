@@ -0,0 +1,64 @@
+import json
+from collections import Counter
+
+from sqlmodel import Session
+
+from core import archive, counters
+
+
+def _summary(client, team):
+    (row,) = client.get(f"/tasks/summary?project_id={team.project_id}").json()
+    return row["counts"], row["total"]
+
+
+def _statuses(client, team):
+    tasks = client.get(f"/tasks?project_id={team.project_id}&include_archived=true").json()
+    return dict(Counter(t["status"] for t in tasks)), len(tasks)
+
+
+def _write_everywhere(client, team):
+    m0, m1 = team.members
+    created = [
+        client.post(f"/create_task?project_id={team.project_id}", json={"title": f"t{i}", "assigned_to": m0}).json()
+        for i in range(3)
+    ]
+    client.post(f"/bulk_tasks/{team.project_id}", json={"title": "bulk", "assigned_to": [m0, m1]})
+    client.patch(f"/tasks/{created[0]['id']}/status?user_id={m0}", json={"status": "Completed"})
+    client.patch(f"/tasks/status?user_id={m0}", json={"status": "In Progress", "tasks": [
+        {"id": created[1]["id"]}, {"id": created[2]["id"], "version": 99},
+    ]})
+    body = "\n".join([
+        json.dumps({"title": "imported", "assigned_to": m1, "status": "Completed"}),
+        json.dumps({"title": "imported", "assigned_to": m1}),
+        json.dumps({"title": "not a member", "assigned_to": 999999}),
+    ])
+    r = client.post(f"/import_tasks/{team.project_id}?format=ndjson", content=body)
+    assert (r.json()["inserted"], r.json()["failed"]) == (2, 1)
+
+
+def test_counters_follow_every_write_path(client, engine, team):
+    _write_everywhere(client, team)
+
+    counts, total = _summary(client, team)
+    assert (counts, total) == _statuses(client, team)
+    assert counts == {"To-Do": 4, "In Progress": 1, "Completed": 2}
+    with Session(engine) as session:
+        assert counters.drift(session) == []
+
+
+def test_archiving_keeps_counts(client, engine, team):
+    _write_everywhere(client, team)
+    before = _summary(client, team)
+
+    assert archive.archive_completed(engine, older_than_days=0) >= 2
+    assert _summary(client, team) == before
+    with Session(engine) as session:
+        assert counters.drift(session) == []
+
+
+def test_rebuild_matches_incremental_counts(client, engine, team):
+    _write_everywhere(client, team)
+    with Session(engine) as session:
+        incremental = counters.stored(session)
+        counters.rebuild(session)
+        assert counters.stored(session) == incremental
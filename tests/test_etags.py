@@ -0,0 +1,73 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@contextmanager
+def _statements():
+    # every engine: requests run on the async one when DB_MODE=async
+    seen = []
+
+    def record(conn, cursor, statement, *args):
+        seen.append(statement.lower())
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        yield seen
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+
+def _revalidate(client, url):
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    again = client.get(url, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    return etag
+
+
+@pytest.mark.parametrize("url", [
+    "/projects?team_id={team_id}",
+    "/tasks?project_id={project_id}",
+    "/teams_list",
+    "/users_list",
+    "/admin/tasks",
+    "/member/tasks?user_id={member}",
+])
+def test_matching_etag_gets_304_until_a_write(client, team, url):
+    url = url.format(team_id=team.team_id, project_id=team.project_id, member=team.members[0])
+    etag = _revalidate(client, url)
+
+    # one write that every list above covers: a new user in a new team with a project and a task
+    user = client.post("/signup", json={"name": "late joiner", "email": f"late{team.team_id}@example.com", "password": "secret1"}).json()["id"]
+    client.post("/create_team", json={"name": "late", "member_ids": [team.members[0], user]})
+    client.post(f"/create_project?admin_id={team.members[0]}", json={"name": "late", "team_id": team.team_id})
+    client.post(f"/create_task?project_id={team.project_id}", json={"title": "late", "assigned_to": team.members[0]})
+
+    r = client.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+
+
+def test_304_skips_the_list_query(client, team):
+    url = f"/tasks?project_id={team.project_id}"
+    etag = client.get(url).headers["etag"]
+    with _statements() as seen:
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    assert seen
+    assert not [s for s in seen if "from task" in s]
+
+
+def test_writes_elsewhere_keep_scoped_etags(client, team):
+    other_project = client.post(
+        f"/create_project?admin_id={team.members[0]}", json={"name": "other", "team_id": team.team_id}
+    ).json()["id"]
+    url = f"/tasks?project_id={team.project_id}"
+    etag = _revalidate(client, url)
+
+    client.post(f"/create_task?project_id={other_project}", json={"title": "elsewhere", "assigned_to": team.members[1]})
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
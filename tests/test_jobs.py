@@ -0,0 +1,97 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from sqlalchemy import func, update
+from sqlmodel import Session, select
+
+import worker
+from core import jobs
+from core.database import get_async_session
+from models.models import Job, Task
+
+
+def _claim(engine, job_id, worker_id):
+    job = jobs.claim(engine, worker_id)
+    assert job is not None and job.id == job_id
+    return job
+
+
+def _expire_claim(engine, job_id):
+    with engine.begin() as conn:
+        conn.execute(update(Job).where(Job.id == job_id).values(available_at=0))
+
+
+def _task_count(engine, project_id):
+    with Session(engine) as session:
+        return session.exec(select(func.count()).select_from(Task).where(Task.project_id == project_id)).one()
+
+
+def _enqueue_bulk(client, team):
+    r = client.post(f"/bulk_tasks/{team.project_id}?background=true", json={"title": "job", "assigned_to": team.members})
+    assert r.status_code == 202
+    assert r.json()["status"] == "queued"
+    return r.json()["id"], r.headers["location"]
+
+
+def test_bulk_job_runs_in_the_worker(client, engine, team):
+    job_id, location = _enqueue_bulk(client, team)
+    assert _task_count(engine, team.project_id) == 0
+
+    asyncio.run(worker.run_job(_claim(engine, job_id, "w1"), "w1"))
+
+    status = client.get(location).json()
+    assert status["status"] == "succeeded"
+    assert len(status["result"]["task_ids"]) == 2
+    assert _task_count(engine, team.project_id) == 2
+
+
+def test_retry_after_a_crash_does_not_insert_again(client, engine, team):
+    job_id, location = _enqueue_bulk(client, team)
+    job = _claim(engine, job_id, "w1")
+
+    async def die_before_complete():
+        # the handler's transaction commits, then the worker is gone
+        token = jobs.current_job.set(job.id)
+        try:
+            async with asynccontextmanager(get_async_session)() as session:
+                return await jobs.HANDLERS[job.kind](session, job.payload)
+        finally:
+            jobs.current_job.reset(token)
+
+    first = asyncio.run(die_before_complete())
+    assert _task_count(engine, team.project_id) == 2
+
+    _expire_claim(engine, job_id)
+    retry = _claim(engine, job_id, "w2")
+    assert retry.attempts == 2
+    asyncio.run(worker.run_job(retry, "w2"))
+
+    assert _task_count(engine, team.project_id) == 2
+    status = client.get(location).json()
+    assert status["status"] == "succeeded"
+    assert status["result"] == first
+
+
+@jobs.handler("test_always_fails")
+async def _always_fails(session, payload):
+    raise RuntimeError(payload["why"])
+
+
+def test_failing_job_is_retried_then_given_up(client, engine):
+    with Session(engine) as session:
+        job_id = jobs.enqueue(session, "test_always_fails", {"why": "boom"}, max_attempts=2).id
+        session.commit()
+
+    asyncio.run(worker.run_job(_claim(engine, job_id, "w1"), "w1"))
+    status = client.get(f"/jobs/{job_id}").json()
+    assert status["status"] == "queued"
+    assert "boom" in status["error"]
+    assert jobs.claim(engine, "w1") is None      # backing off
+
+    _expire_claim(engine, job_id)
+    asyncio.run(worker.run_job(_claim(engine, job_id, "w2"), "w2"))
+    assert client.get(f"/jobs/{job_id}").json()["status"] == "failed"
+
+
+def test_unknown_job_is_404(client):
+    assert client.get("/jobs/999999").status_code == 404
@@ -0,0 +1,50 @@
+from core.pagination import NEXT_CURSOR_HEADER
+
+
+def _create_tasks(client, team, n):
+    url = f"/create_task?project_id={team.project_id}"
+    return [client.post(url, json={"title": f"page {i}", "assigned_to": team.members[0]}).json()["id"] for i in range(n)]
+
+
+def _walk(client, url, limit, stream=False):
+    ids, pages, cursor = [], 0, None
+    while True:
+        r = client.get(url, params={"limit": limit, "after": cursor, "stream": stream})
+        assert r.status_code == 200, r.text
+        page = r.json()
+        assert len(page) <= limit
+        ids += [row["id"] for row in page]
+        pages += 1
+        cursor = r.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return ids, pages
+
+
+def test_cursor_pages_cover_the_list_once(client, team):
+    created = _create_tasks(client, team, 7)
+    ids, pages = _walk(client, f"/tasks?project_id={team.project_id}", limit=3)
+    assert ids == created
+    assert pages == 3
+
+
+def test_streamed_page_stops_at_limit_and_sends_cursor(client, team):
+    created = _create_tasks(client, team, 7)
+    r = client.get(f"/tasks?project_id={team.project_id}&limit=3&stream=true")
+    assert [t["id"] for t in r.json()] == created[:3]
+    assert NEXT_CURSOR_HEADER.lower() in r.headers
+
+    ids, pages = _walk(client, f"/tasks?project_id={team.project_id}", limit=3, stream=True)
+    assert ids == created
+    assert pages == 3
+
+
+def test_last_page_has_no_cursor(client, team):
+    created = _create_tasks(client, team, 3)
+    for stream in (False, True):
+        r = client.get(f"/tasks?project_id={team.project_id}&limit=3&stream={str(stream).lower()}")
+        assert [t["id"] for t in r.json()] == created
+        assert NEXT_CURSOR_HEADER not in r.headers
+
+
+def test_invalid_cursor_is_rejected(client):
+    assert client.get("/tasks?limit=3&after=not-a-cursor").status_code == 400
@@ -0,0 +1,40 @@
+from sqlalchemy import text
+from sqlmodel import select
+
+from core import archive, bulk
+from core.migrations import full_scans
+from core.pagination import PageParams, apply_keyset, encode_cursor
+from routes.project import _admin_tasks_archived_query, _member_tasks_archived_query
+
+
+def _plan(engine, query):
+    sql = str(query.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        return [row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql))]
+
+
+def _page(query, id_column):
+    return apply_keyset(query, id_column, PageParams(limit=100, after=encode_cursor(1), stream=False))
+
+
+def test_hot_queries_use_indexes(engine):
+    assert full_scans(engine) == {}
+
+
+def test_filtered_archive_pages_seek_in_id_order(engine):
+    t = archive.all_tasks
+    queries = {
+        "member_tasks": _page(_member_tasks_archived_query.where(t.assigned_to == 1), t.id),
+        "tasks_by_user": _page(select(*bulk.task_columns(t)).where(t.assigned_to == 1), t.id),
+        "tasks_by_project": _page(select(*bulk.task_columns(t)).where(t.project_id == 1), t.id),
+    }
+    for name, query in queries.items():
+        plan = _plan(engine, query)
+        assert not [line for line in plan if "TEMP B-TREE" in line], (name, plan)
+        assert not [line for line in plan if line.startswith("SCAN task")], (name, plan)
+
+
+def test_admin_archive_page_is_not_sorted(engine):
+    # no filter: reading both tables in id order is the plan, sorting them is not
+    plan = _plan(engine, _page(_admin_tasks_archived_query, archive.all_tasks.id))
+    assert not [line for line in plan if "TEMP B-TREE" in line], plan
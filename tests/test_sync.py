@@ -0,0 +1,79 @@
+from sqlmodel import Session, select
+
+from core import archive, changes
+from models.models import ChangeLog
+
+
+def _head(client):
+    r = client.get("/sync").json()
+    assert r["full_resync"] is True
+    return r["seq"]
+
+
+def test_sync_returns_each_changed_entity_once(client, team):
+    since = _head(client)
+    m0 = team.members[0]
+    task = client.post(f"/create_task?project_id={team.project_id}", json={"title": "sync", "assigned_to": m0}).json()
+    client.patch(f"/tasks/{task['id']}/status?user_id={m0}", json={"status": "In Progress"})
+    project = client.post(f"/create_project?admin_id={m0}", json={"name": "synced", "team_id": team.team_id}).json()
+
+    r = client.get(f"/sync?since={since}").json()
+    assert r["full_resync"] is False and r["has_more"] is False
+    assert r["seq"] > since
+    assert [(t["id"], t["status"]) for t in r["tasks"]] == [(task["id"], "In Progress")]
+    assert [p["id"] for p in r["projects"]] == [project["id"]]
+
+    caught_up = client.get(f"/sync?since={r['seq']}").json()
+    assert caught_up["seq"] == r["seq"]
+    assert caught_up["tasks"] == caught_up["projects"] == []
+
+
+def test_sync_pages_through_a_long_log(client, team):
+    since = _head(client)
+    created = [
+        client.post(f"/create_task?project_id={team.project_id}", json={"title": f"s{i}", "assigned_to": team.members[1]}).json()["id"]
+        for i in range(5)
+    ]
+    seen, pages = [], 0
+    while True:
+        r = client.get(f"/sync?since={since}&limit=2").json()
+        seen += [t["id"] for t in r["tasks"]]
+        since, pages = r["seq"], pages + 1
+        if not r["has_more"]:
+            break
+    assert seen == created
+    assert pages == 3
+
+
+def test_archived_tasks_sync_as_deleted(client, engine, team):
+    m0 = team.members[0]
+    task = client.post(f"/create_task?project_id={team.project_id}", json={"title": "done", "assigned_to": m0}).json()
+    client.patch(f"/tasks/{task['id']}/status?user_id={m0}", json={"status": "Completed"})
+    since = _head(client)
+
+    archive.archive_completed(engine, older_than_days=0)
+    r = client.get(f"/sync?since={since}").json()
+    assert task["id"] in r["deleted"]["tasks"]
+
+
+def test_rolled_back_writes_leave_no_entries(engine):
+    with Session(engine) as session:
+        changes.record(session, "task", [987654], "update")
+        session.rollback()
+        session.commit()
+    with Session(engine) as session:
+        assert session.exec(select(ChangeLog.seq).where(ChangeLog.entity_id == 987654)).all() == []
+
+
+def test_cursor_behind_compaction_needs_full_resync(client, engine, team):
+    stale = _head(client)
+    client.post(f"/create_task?project_id={team.project_id}", json={"title": "old", "assigned_to": team.members[0]})
+    current = client.get(f"/sync?since={stale}").json()["seq"]
+
+    assert changes.compact(engine, retention=0) == current
+    assert client.get(f"/sync?since={stale}").json()["full_resync"] is True
+    fresh = client.get(f"/sync?since={current}").json()
+    assert fresh["full_resync"] is False and fresh["seq"] == current
+
+    client.post(f"/create_task?project_id={team.project_id}", json={"title": "new", "assigned_to": team.members[0]})
+    assert len(client.get(f"/sync?since={current}").json()["tasks"]) == 1
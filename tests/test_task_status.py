@@ -0,0 +1,54 @@
+def _create_task(client, team, assignee=0):
+    r = client.post(f"/create_task?project_id={team.project_id}", json={"title": "status", "assigned_to": team.members[assignee]})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_stale_version_gets_409_and_keeps_the_first_write(client, team):
+    task = _create_task(client, team)
+    url = f"/tasks/{task['id']}/status?user_id={team.members[0]}"
+    # two clients both loaded the task at this version
+    first = client.patch(url, json={"status": "In Progress", "version": task["version"]})
+    assert first.status_code == 200
+    assert first.json()["version"] == task["version"] + 1
+
+    second = client.patch(url, json={"status": "Completed", "version": task["version"]})
+    assert second.status_code == 409
+
+    (row,) = [t for t in client.get(f"/tasks?project_id={team.project_id}").json() if t["id"] == task["id"]]
+    assert row["status"] == "In Progress"
+    assert row["version"] == task["version"] + 1
+
+
+def test_update_without_version_still_applies(client, team):
+    task = _create_task(client, team)
+    r = client.patch(f"/tasks/{task['id']}/status?user_id={team.members[0]}", json={"status": "Completed"})
+    assert r.status_code == 200
+    assert r.json()["status"] == "Completed"
+
+
+def test_not_found_and_not_yours_are_not_conflicts(client, team):
+    task = _create_task(client, team)
+    assert client.patch(f"/tasks/{task['id']}/status?user_id={team.members[1]}", json={"status": "Completed"}).status_code == 403
+    assert client.patch(f"/tasks/999999/status?user_id={team.members[0]}", json={"status": "Completed"}).status_code == 404
+
+
+def test_batch_applies_current_versions_and_rejects_the_rest(client, team):
+    fresh = _create_task(client, team)
+    stale = _create_task(client, team)
+    unversioned = _create_task(client, team)
+    theirs = _create_task(client, team, assignee=1)
+    client.patch(f"/tasks/{stale['id']}/status?user_id={team.members[0]}", json={"status": "In Progress"})
+
+    r = client.patch(f"/tasks/status?user_id={team.members[0]}", json={"status": "Completed", "tasks": [
+        {"id": fresh["id"], "version": fresh["version"]},
+        {"id": stale["id"], "version": stale["version"]},
+        {"id": unversioned["id"]},
+        {"id": theirs["id"]},
+        {"id": 999999},
+    ]})
+    assert r.status_code == 200
+    assert r.json() == {
+        "applied": [fresh["id"], unversioned["id"]],
+        "rejected": [stale["id"], theirs["id"], 999999],
+    }
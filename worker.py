@@ -0,0 +1,121 @@
+"""
+Background job worker: runs the jobs that endpoints queued with `background=true`.
+
+    python worker.py                  # poll until SIGTERM / Ctrl-C
+    python worker.py --once           # drain the due jobs, then exit
+
+Run one or more next to `uvicorn main:app`, against the same DATABASE_URL.
+Each worker claims one job at a time; a job whose worker dies is picked up
+again after JOB_VISIBILITY_TIMEOUT seconds, and failed jobs are retried with
+exponential backoff up to their max_attempts. Every PURGE_INTERVAL seconds
+workers also purge old jobs, compact the /sync change log and archive tasks
+completed more than ARCHIVE_AFTER_DAYS ago (see core/archive.py).
+
+Task events published by jobs reach the `/events` subscribers of this process
+only, i.e. none, until a cross-process broker is configured (see core/events.py).
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import time
+from contextlib import asynccontextmanager
+
+from core import archive, changes, jobs
+from core.database import async_engine, engine, get_async_session
+from core.migrations import migrate
+from core.passwords import password_hasher
+
+# route modules register their job handlers on import
+import routes.imports  # noqa: F401
+import routes.project  # noqa: F401
+
+logger = logging.getLogger("app.worker")
+
+# Seconds between purges of finished jobs past JOB_RETENTION, compactions
+# of the change log past CHANGELOG_RETENTION and task archival runs
+PURGE_INTERVAL = 600
+# Longest archival run per interval, so queued jobs are not held up for long
+ARCHIVE_MAX_SECONDS = 30
+
+
+async def run_job(job: jobs.ClaimedJob, worker_id: str) -> None:
+    start = time.perf_counter()
+    current = jobs.current_job.set(job.id)
+    try:
+        fn = jobs.HANDLERS[job.kind]
+        async with asynccontextmanager(get_async_session)() as session:
+            result = await fn(session, job.payload)
+    except Exception as e:
+        logger.exception("job %s (%s) attempt %d/%d failed", job.id, job.kind, job.attempts, job.max_attempts)
+        jobs.fail(engine, job, worker_id, f"{type(e).__name__}: {e}")
+    else:
+        if not jobs.complete(engine, job, worker_id, result):
+            logger.warning("job %s (%s) finished after its claim expired", job.id, job.kind)
+    finally:
+        jobs.current_job.reset(current)
+        jobs.JOB_DURATION.observe(time.perf_counter() - start, labels=(job.kind,))
+
+
+async def run(worker_id: str, poll_interval: float, once: bool) -> None:
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    try:
+        await _poll(worker_id, poll_interval, once, stopping)
+    finally:
+        if async_engine is not None:
+            await async_engine.dispose()
+
+
+async def _poll(worker_id: str, poll_interval: float, once: bool, stopping: asyncio.Event) -> None:
+    next_purge = 0.0
+    while not stopping.is_set():
+        if time.monotonic() >= next_purge:
+            jobs.purge(engine)
+            changes.compact(engine)
+            archived = archive.archive_completed(engine, max_seconds=ARCHIVE_MAX_SECONDS)
+            if archived:
+                logger.info("archived %d completed task(s)", archived)
+            next_purge = time.monotonic() + PURGE_INTERVAL
+        expired = jobs.reap(engine)
+        if expired:
+            logger.warning("%d job(s) failed: last attempt exceeded the visibility timeout", expired)
+
+        job = jobs.claim(engine, worker_id)
+        if job is not None:
+            # the current job is always finished before a stop signal is honoured
+            await run_job(job, worker_id)
+            continue
+        if once:
+            return
+        try:
+            await asyncio.wait_for(stopping.wait(), poll_interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--poll-interval", type=float, default=float(os.getenv("JOB_POLL_INTERVAL", "1.0")),
+                        help="seconds to sleep when no job is due")
+    parser.add_argument("--once", action="store_true", help="exit when no job is due")
+    parser.add_argument("--id", default=f"{socket.gethostname()}:{os.getpid()}", help="worker name stored on claims")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    migrate(engine)
+    logger.info("worker %s started", args.id)
+    try:
+        asyncio.run(run(args.id, args.poll_interval, args.once))
+    finally:
+        password_hasher.shutdown()
+    logger.info("worker %s stopped", args.id)
+
+
+if __name__ == "__main__":
+    main()